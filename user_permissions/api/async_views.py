@@ -0,0 +1,189 @@
+"""Асинхронные представления для работы под ASGI.
+
+Представления не используют DRF и синхронный ORM: запросы к базе данных
+выполняются через асинхронный интерфейс ORM, а проверка пароля - в
+ограниченном пуле потоков, чтобы хеширование не блокировало цикл событий.
+"""
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from time import perf_counter
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from .budgets import query_budget
+from .serializers import PermissionCheckSerializer, UserSerializer
+from permissions import engine
+from permissions.audit import record_decision
+from permissions.constants import APP_NAME as PERMISSIONS_APP_NAME
+from permissions.constants import PERMISSIONS_CHECK_METHODS
+from permissions.registry import permission_registry, permission_rule
+from users.authentication import (
+    PrincipalJWTAuthentication,
+    aget_user_instance
+)
+from users.constants import (
+    APP_NAME,
+    INVALID_CREDENTIALS_MESSAGE,
+    USER_LOGIN_REGISTER_DELETE,
+    USER_UPDATE_METHODS_LIST
+)
+from users.tokens import RolesRefreshToken
+from users.utils import check_user_password, get_setting
+
+
+User = get_user_model()
+
+password_executor = ThreadPoolExecutor(
+    max_workers=get_setting('ASYNC_PASSWORD_WORKERS'),
+    thread_name_prefix='password-check'
+)
+
+
+def json_response(data, status=HTTPStatus.OK):
+    """JSON-ответ без экранирования кириллицы, как в DRF."""
+    return JsonResponse(
+        data, status=status, json_dumps_params={'ensure_ascii': False}
+    )
+
+
+def read_json(request) -> dict:
+    """Разбор тела запроса в формате JSON."""
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+async def authorize(request):
+    """Аутентификация и проверка прав для асинхронного представления.
+
+    Приложение и действие берутся из правила представления в реестре
+    (см. permissions.registry). Решение учитывается в метриках и журнале
+    аудита так же, как в EnginePermission. Возвращает пару (пользователь,
+    ответ с ошибкой или None).
+    """
+    rule = permission_registry.get_rule(request)
+    try:
+        user = await PrincipalJWTAuthentication().aauthenticate(request)
+    except AuthenticationFailed as error:
+        detail = error.detail
+        return None, json_response(
+            detail if isinstance(detail, dict) else {'detail': detail},
+            HTTPStatus.UNAUTHORIZED
+        )
+    if user is None:
+        return None, json_response(
+            {'detail': 'Учетные данные не были предоставлены.'},
+            HTTPStatus.UNAUTHORIZED
+        )
+    if rule is None:
+        allowed = False
+    else:
+        start = perf_counter()
+        action = rule.method_actions.get(request.method)
+        allowed = action is not None and (
+            await engine.acheck(user, rule.slug, action) or user.is_admin
+        )
+        record_decision(user, rule.slug, action, allowed, start)
+    if not allowed:
+        return None, json_response(
+            {'detail': 'У вас недостаточно прав для выполнения данного '
+             'действия.'},
+            HTTPStatus.FORBIDDEN
+        )
+    return user, None
+
+
+@query_budget(3)
+@csrf_exempt
+@require_http_methods(USER_LOGIN_REGISTER_DELETE)
+async def login_view(request):
+    """Асинхронная аутентификация пользователя по email и паролю."""
+    data = read_json(request)
+    if data is None:
+        return json_response(
+            {'detail': 'Некорректный JSON.'}, HTTPStatus.BAD_REQUEST
+        )
+    errors = {
+        field: ['Обязательное поле.']
+        for field in ('email', 'password') if not data.get(field)
+    }
+    if errors:
+        return json_response(errors, HTTPStatus.BAD_REQUEST)
+    user = await User.objects.filter(email=data['email']).afirst()
+    password_valid = await asyncio.get_running_loop().run_in_executor(
+        password_executor, check_user_password, user, data['password']
+    )
+    if user is None or not user.is_active or not password_valid:
+        return json_response(
+            {'non_field_errors': [INVALID_CREDENTIALS_MESSAGE]},
+            HTTPStatus.BAD_REQUEST
+        )
+    token = await sync_to_async(RolesRefreshToken.for_user)(user)
+    return json_response(
+        {'refresh': str(token), 'access': str(token.access_token)}
+    )
+
+
+@permission_rule(APP_NAME, methods=USER_UPDATE_METHODS_LIST)
+@query_budget(3)
+@csrf_exempt
+@require_http_methods(USER_UPDATE_METHODS_LIST)
+async def user_update_view(request):
+    """Асинхронная обработка запросов через эндпоинт /users/me/."""
+    user, error = await authorize(request)
+    if error is not None:
+        return error
+    user = await aget_user_instance(user)
+    if request.method == 'GET':
+        return json_response(UserSerializer(user).data)
+    data = read_json(request)
+    if data is None:
+        return json_response(
+            {'detail': 'Некорректный JSON.'}, HTTPStatus.BAD_REQUEST
+        )
+    data.pop('email', None)
+    serializer = UserSerializer(user, data=data, partial=True)
+    if not serializer.is_valid():
+        return json_response(serializer.errors, HTTPStatus.BAD_REQUEST)
+    for attr, value in serializer.validated_data.items():
+        setattr(user, attr, value)
+    if serializer.validated_data:
+        await user.asave(update_fields=list(serializer.validated_data))
+    return json_response(UserSerializer(user).data)
+
+
+@permission_rule(
+    PERMISSIONS_APP_NAME, methods=PERMISSIONS_CHECK_METHODS,
+    actions={'POST': 'get_list'}
+)
+@query_budget(3)
+@csrf_exempt
+@require_http_methods(PERMISSIONS_CHECK_METHODS)
+async def permissions_check_view(request):
+    """Асинхронная массовая проверка прав доступа пользователей."""
+    _, error = await authorize(request)
+    if error is not None:
+        return error
+    serializer = PermissionCheckSerializer(data=read_json(request) or {})
+    if not serializer.is_valid():
+        return json_response(serializer.errors, HTTPStatus.BAD_REQUEST)
+    checks = serializer.validated_data['checks']
+    decisions = await engine.acheck_users(
+        (item.get('user_id', item.get('email')), item['slug'], item['action'])
+        for item in checks
+    )
+    return json_response({
+        'results': [
+            {**item, 'allowed': allowed}
+            for item, allowed in zip(checks, decisions)
+        ]
+    })
@@ -0,0 +1,88 @@
+"""Бюджеты SQL-запросов для представлений.
+
+Представление объявляет максимальное число SQL-запросов на один запрос:
+функция - декоратором query_budget, ViewSet - атрибутом query_budget
+(числом или словарем {action: число}). MetricsMiddleware считает
+запросы и после ответа проверяет бюджет, а также ищет одинаковые
+SQL-запросы, повторенные QUERY_REPEAT_LIMIT и больше раз (признак N+1).
+
+Нарушение записывается в лог и в метрику
+http_query_budget_violations_total, а в режиме разработки и в тестах
+(настройка QUERY_BUDGET_RAISE, по умолчанию равна DEBUG, в тестовых
+настройках включена) еще и выбрасывает QueryBudgetExceeded.
+"""
+import logging
+
+from django.conf import settings
+
+from .constants import QUERY_REPEAT_LIMIT
+from permissions.metrics import QUERY_BUDGET_VIOLATIONS
+from users.utils import get_setting
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    """Представление выполнило больше SQL-запросов, чем объявлено."""
+
+
+def query_budget(max_queries: int):
+    """Задает бюджет SQL-запросов для функции-представления.
+
+    Декоратор ставится над @api_view (в асинхронных представлениях - над
+    @csrf_exempt), чтобы бюджет получило итоговое представление.
+    """
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def get_query_budget(match, method: str):
+    """Бюджет SQL-запросов представления маршрута или None."""
+    view = match.func
+    budget = getattr(view, 'query_budget', None)
+    view_class = getattr(view, 'cls', None)
+    if budget is None and view_class is not None:
+        budget = getattr(view_class, 'query_budget', None)
+    if isinstance(budget, dict):
+        actions = getattr(view, 'actions', None) or {}
+        budget = budget.get(actions.get(method.lower()))
+    return budget
+
+
+def check_query_budget(request, view_name: str, queries):
+    """Проверяет число и повторы SQL-запросов после ответа.
+
+    queries - счетчик {текст SQL: число выполнений} запроса.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return
+    problems = []
+    total = sum(queries.values())
+    budget = get_query_budget(match, request.method)
+    if budget is not None and total > budget:
+        problems.append(('budget', (
+            f'{request.method} {view_name}: {total} SQL-запросов '
+            f'при бюджете {budget}.'
+        )))
+    for sql, repeats in queries.items():
+        if repeats >= QUERY_REPEAT_LIMIT:
+            problems.append(('repeated', (
+                f'{request.method} {view_name}: запрос выполнен '
+                f'{repeats} раз (N+1): {sql[:200]}'
+            )))
+    if not problems:
+        return
+    for kind, message in problems:
+        QUERY_BUDGET_VIOLATIONS.inc(view_name, kind)
+        logger.warning(message)
+    raise_errors = get_setting('QUERY_BUDGET_RAISE')
+    if raise_errors is None:
+        raise_errors = settings.DEBUG
+    if raise_errors:
+        raise QueryBudgetExceeded(' '.join(
+            message for _, message in problems
+        ))
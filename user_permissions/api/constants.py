@@ -1,2 +1,8 @@
 """Константы для API."""
 API_VERSION = 'v1'
+KEYSET_PAGE_SIZE = 5
+KEYSET_MAX_PAGE_SIZE = 1000
+APPROXIMATE_COUNT_THRESHOLD = 100000
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+QUERY_REPEAT_LIMIT = 5
+MOCK_APP_NAME = 'mock'
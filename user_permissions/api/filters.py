@@ -0,0 +1,34 @@
+"""Фильтры списков API."""
+from rest_framework.filters import SearchFilter
+
+from users.constants import SEARCH_MODE_PREFIX
+from users.utils import get_setting
+
+
+class IndexedSearchFilter(SearchFilter):
+    """Поиск, который опирается на индексы по email и именам.
+
+    Режим задается атрибутом представления search_mode или настройкой
+    SEARCH_MODE:
+
+    * trigram - поиск подстроки (ILIKE '%term%'), его обслуживают
+      GIN-индексы pg_trgm по UPPER(поле);
+    * prefix - поиск по началу строки (ILIKE 'term%'), его обслуживают
+      B-tree индексы по UPPER(поле) с text_pattern_ops.
+    """
+
+    def get_search_mode(self, view) -> str:
+        return getattr(view, 'search_mode', None) or get_setting(
+            'SEARCH_MODE'
+        )
+
+    def get_search_fields(self, view, request):
+        search_fields = super().get_search_fields(view, request)
+        if not search_fields or (
+            self.get_search_mode(view) != SEARCH_MODE_PREFIX
+        ):
+            return search_fields
+        return [
+            field if field[0] in self.lookup_prefixes else f'^{field}'
+            for field in search_fields
+        ]
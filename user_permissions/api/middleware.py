@@ -0,0 +1,114 @@
+"""Middleware проекта."""
+from contextlib import ExitStack
+from time import perf_counter
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async
+)
+from django.db import connections
+
+from .budgets import check_query_budget
+from permissions.metrics import (
+    HTTP_DB_QUERIES,
+    HTTP_REQUEST_SECONDS,
+    queries_tracked
+)
+
+
+def get_view_name(request) -> str:
+    """Имя маршрута запроса для меток метрик."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name
+
+
+class QueryCounter:
+    """Обертка выполнения SQL, которая считает запросы по тексту SQL.
+
+    Параметры в текст не входят, поэтому одинаковые запросы с разными
+    значениями учитываются вместе.
+    """
+
+    def __init__(self):
+        self.queries = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if queries_tracked():
+            self.queries[sql] = self.queries.get(sql, 0) + 1
+        return execute(sql, params, many, context)
+
+    @property
+    def count(self) -> int:
+        return sum(self.queries.values())
+
+
+class MetricsMiddleware:
+    """Время обработки и число SQL-запросов по представлениям.
+
+    Запросы считаются через connection.execute_wrapper на все
+    подключения к базам данных и сверяются с бюджетом представления
+    (см. api.budgets). Подключения у каждого потока свои, а ORM в
+    асинхронных представлениях работает через
+    sync_to_async(thread_sensitive=True), поэтому для них обертки
+    ставятся и снимаются в том же потоке, где выполняются запросы ORM.
+
+    Перед первым запросом процесса подключения к базам данных
+    открываются до начала подсчета: при первом подключении
+    django.contrib.postgres читает OID типов hstore и citext, и эти
+    запросы не относятся к представлению. Загрузки кэшей (матрица прав,
+    состояние пользователей) выполняются в untracked_queries, поэтому
+    бюджет проверяется и в первом запросе.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.connected = False
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def count_queries(self, stack, counter):
+        """Подключает counter ко всем подключениям текущего потока."""
+        if not self.connected:
+            for connection in connections.all():
+                connection.ensure_connection()
+            self.connected = True
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(counter))
+
+    def observe(self, request, start, counter):
+        view = get_view_name(request)
+        HTTP_REQUEST_SECONDS.observe(
+            perf_counter() - start, view, request.method
+        )
+        HTTP_DB_QUERIES.observe(counter.count, view)
+        check_query_budget(request, view, counter.queries)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        start = perf_counter()
+        counter = QueryCounter()
+        with ExitStack() as stack:
+            self.count_queries(stack, counter)
+            response = self.get_response(request)
+        self.observe(request, start, counter)
+        return response
+
+    async def __acall__(self, request):
+        start = perf_counter()
+        counter = QueryCounter()
+        stack = ExitStack()
+        await sync_to_async(self.count_queries)(stack, counter)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        self.observe(request, start, counter)
+        return response
@@ -1,10 +1,12 @@
 from http import HTTPStatus
 
 from django.contrib.auth import get_user_model
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view
 
 from permissions.models import BusinessElements, Permissions
-from api.mock_permissions import MockRolesPermissions
+from api.budgets import query_budget
+from api.constants import MOCK_APP_NAME
+from permissions.registry import permission_rule
 
 
 from unittest.mock import Mock
@@ -16,8 +18,9 @@ from rest_framework import status
 User = get_user_model()
 
 
+@permission_rule(MOCK_APP_NAME)
+@query_budget(2)
 @api_view(['get', 'post', 'put', 'patch', 'delete'])
-@permission_classes([MockRolesPermissions])
 def mock_view(request):
     potential_objects = {'objects': ['obj1', 'obj2', 'obj3']}
     return HttpResponse(str(potential_objects), status=HTTPStatus.OK)
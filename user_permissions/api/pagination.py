@@ -0,0 +1,138 @@
+"""Пагинация списков: номера страниц или курсор без OFFSET и COUNT(*)."""
+import hashlib
+
+from django.core.cache import cache
+from django.db import connections
+from rest_framework.pagination import (
+    CursorPagination,
+    PageNumberPagination
+)
+from rest_framework.response import Response
+
+from .constants import (
+    APPROXIMATE_COUNT_THRESHOLD,
+    KEYSET_MAX_PAGE_SIZE,
+    KEYSET_PAGE_SIZE
+)
+from users.utils import get_setting
+
+
+def _estimate_count(queryset):
+    """Оценка числа строк таблицы по статистике PostgreSQL."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [queryset.model._meta.db_table]
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def get_count(queryset) -> int:
+    """Возвращает приближенное или закэшированное число объектов.
+
+    Для запроса без фильтров к большой таблице PostgreSQL берется оценка
+    из pg_class.reltuples без сканирования таблицы, в остальных случаях
+    выполняется COUNT(*). Результат кэшируется на
+    PAGINATION_COUNT_CACHE_TIMEOUT секунд.
+    """
+    queryset = queryset.order_by()
+    sql, params = queryset.query.sql_with_params()
+    key = 'pagination-count:' + hashlib.md5(
+        f'{queryset.db}:{sql}:{params!r}'.encode()
+    ).hexdigest()
+    count = cache.get(key)
+    if count is not None:
+        return count
+    if not queryset.query.where:
+        count = _estimate_count(queryset)
+        if count is not None and count < APPROXIMATE_COUNT_THRESHOLD:
+            count = None
+    if count is None:
+        count = queryset.count()
+    cache.set(key, count, get_setting('PAGINATION_COUNT_CACHE_TIMEOUT'))
+    return count
+
+
+class KeysetPagination(CursorPagination):
+    """Курсорная пагинация по первичному ключу.
+
+    Страница выбирается условием id > курсор с LIMIT по индексу, поэтому
+    любая страница стоит столько же, сколько первая. Размер страницы
+    задается параметром page_size, общее число объектов - приближенное
+    или закэшированное (см. get_count).
+    """
+
+    ordering = 'id'
+    page_size = KEYSET_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = KEYSET_MAX_PAGE_SIZE
+
+    def decode_cursor(self, request):
+        # Пустой параметр cursor включает курсорную пагинацию с первой
+        # страницы.
+        if not request.query_params.get(self.cursor_query_param):
+            return None
+        return super().decode_cursor(request)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = get_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count'] = {
+            'type': 'integer',
+            'example': 123,
+        }
+        return response_schema
+
+
+class ListPagination(PageNumberPagination):
+    """Пагинация по номерам страниц с курсорной по запросу клиента.
+
+    По умолчанию работает параметр page, как в PageNumberPagination.
+    Если в запросе есть параметр cursor (в том числе пустой - первая
+    страница), список отдается через KeysetPagination.
+    """
+
+    keyset_class = KeysetPagination
+
+    def __init__(self):
+        self.keyset = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.keyset_class.cursor_query_param not in request.query_params:
+            self.keyset = None
+            return super().paginate_queryset(queryset, request, view)
+        self.keyset = self.keyset_class()
+        page = self.keyset.paginate_queryset(queryset, request, view)
+        self.display_page_controls = self.keyset.display_page_controls
+        return page
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.keyset is not None:
+            return self.keyset.to_html()
+        return super().to_html()
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            *super().get_schema_operation_parameters(view),
+            *self.keyset_class().get_schema_operation_parameters(view),
+        ]
@@ -1,9 +1,21 @@
-from django.contrib.auth.hashers import check_password, make_password
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
-
-from users.constants import USER_CONSTANTS
-from users.models import Roles, User
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+
+from users.constants import (
+    INVALID_CREDENTIALS_MESSAGE,
+    ROLE_MAX_LENGTH,
+    ROLES_BULK_LIMIT,
+    USER_CONSTANTS
+)
+from users.models import RoleDefinitions, Roles, User
+from users.tokens import RolesRefreshToken
+from users.utils import check_user_password, hash_password
+from permissions.constants import (
+    PERMISSION_ACTIONS,
+    PERMISSIONS_CHECK_LIMIT,
+    PERMISSIONS_CONSTANTS
+)
 from permissions.models import BusinessElements, Permissions
 
 
@@ -52,7 +64,7 @@ class UsersRegistrationSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         """Создание пользователя после валидации данных."""
-        validated_data['password'] = make_password(validated_data['password'])
+        validated_data['password'] = hash_password(validated_data['password'])
         user, _ = User.objects.get_or_create(**validated_data)
         roles, _ = Roles.objects.get_or_create(user=user)
         return user
@@ -72,31 +84,28 @@ class UsersLoginSerializer(serializers.ModelSerializer):
         model = User
         fields = ['email', 'password']
 
-    def validate_email(self, value):
-        """Метод проверки поля email на уникальность."""
-        if User.objects.filter(email=value, is_active=True).exists():
-            return value
-
-        if not User.objects.filter(email=value).exists():
-            raise serializers.ValidationError(
-                'Указанный пользователь еще не зерегистрирован.'
-            )
-        if User.objects.filter(email=value, is_active=False).exists():
-            raise serializers.ValidationError(
-                'Данный аккаунт был удален.'
-            )
-        return value
-
     def validate(self, attrs):
-        """Проверяем указнный пароль для входа."""
-        user = User.objects.get(email=attrs['email'])
-        if not check_password(attrs['password'], user.password):
-            raise serializers.ValidationError(
-                {'password': 'Указан неверный пароль.'}
-            )
+        """Проверяем пользователя и указанный пароль для входа.
+
+        Пользователь загружается одним запросом и передается дальше в
+        attrs['user'], чтобы представлению не нужно было читать его снова.
+        Для неизвестного email, удаленного аккаунта и неверного пароля
+        возвращается одна и та же ошибка.
+        """
+        user = User.objects.filter(email=attrs['email']).first()
+        password_valid = check_user_password(user, attrs['password'])
+        if user is None or not user.is_active or not password_valid:
+            raise serializers.ValidationError(INVALID_CREDENTIALS_MESSAGE)
+        attrs['user'] = user
         return attrs
 
 
+class RolesTokenRefreshSerializer(TokenRefreshSerializer):
+    """Сериализатор обновления access-токена с ролями пользователя."""
+
+    token_class = RolesRefreshToken
+
+
 class UserSerializer(serializers.ModelSerializer):
     """Сериализатор модели User."""
 
@@ -115,12 +124,13 @@ class UserSerializer(serializers.ModelSerializer):
         """Метод обновления данных пользователя.
 
         Обновляем пользовательские данные, убирая данные о email пользователя
-        при PATCH запросе на энд-поинт /users/me/.
+        при PATCH запросе на энд-поинт /users/me/. Сохраняются только
+        переданные поля, от которых доступ пользователя не зависит.
         """
         validated_data.pop('email', None)
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-        instance.save()
+        instance.save(update_fields=list(validated_data))
         return instance
 
 
@@ -152,6 +162,74 @@ class RolesSerializer(serializers.ModelSerializer):
         return value
 
 
+class RolesListSerializer(serializers.Serializer):
+    """Сериализатор списка ролей по строкам values() без моделей."""
+
+    values_fields = ('id', 'user_id', 'user__email', 'role')
+
+    user_id = serializers.IntegerField()
+    user = serializers.EmailField(source='user__email')
+    role_id = serializers.IntegerField(source='id')
+    role = serializers.CharField()
+
+
+class RoleAssignmentSerializer(serializers.Serializer):
+    """Сериализатор пары (email пользователя, роль)."""
+
+    user = serializers.EmailField(max_length=USER_CONSTANTS['email'])
+    role = serializers.SlugField(max_length=ROLE_MAX_LENGTH)
+
+
+class RolesBulkSerializer(serializers.Serializer):
+    """Сериализатор массового назначения и отзыва ролей."""
+
+    roles = RoleAssignmentSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=ROLES_BULK_LIMIT
+    )
+
+    def validate_roles(self, value):
+        """Проверка пользователей и ролей двумя запросами.
+
+        Пользователи должны существовать и не быть удаленными, роли -
+        быть описаны в справочнике ролей. В каждую пару добавляется
+        user_id найденного пользователя.
+        """
+        role_names = {item['role'] for item in value}
+        unknown_roles = sorted(role_names - set(
+            RoleDefinitions.objects.filter(
+                pk__in=role_names
+            ).values_list('pk', flat=True)
+        ))
+        if unknown_roles:
+            raise serializers.ValidationError(
+                f'Роли не описаны в справочнике: {", ".join(unknown_roles)}.'
+            )
+        emails = {item['user'] for item in value}
+        users = {
+            email: (user_id, is_active)
+            for email, user_id, is_active in User.objects.filter(
+                email__in=emails
+            ).values_list('email', 'id', 'is_active')
+        }
+        unknown = sorted(emails - users.keys())
+        if unknown:
+            raise serializers.ValidationError(
+                f'Пользователи не зарегистрированы: {", ".join(unknown)}.'
+            )
+        deleted = sorted(
+            email for email, (_, is_active) in users.items() if not is_active
+        )
+        if deleted:
+            raise serializers.ValidationError(
+                f'Аккаунты были удалены: {", ".join(deleted)}.'
+            )
+        for item in value:
+            item['user_id'] = users[item['user']][0]
+        return value
+
+
 class BusinessElementsSerializer(serializers.ModelSerializer):
     """Сериализатор модели BusinessElements."""
 
@@ -174,3 +252,55 @@ class PermissionsSerializer(serializers.ModelSerializer):
 
         model = Permissions
         fields = '__all__'
+
+
+class PermissionsListSerializer(serializers.Serializer):
+    """Сериализатор списка прав по строкам values() без моделей."""
+
+    values_fields = (
+        'id', 'business_element__slug', 'role',
+        *PERMISSION_ACTIONS.values()
+    )
+
+    id = serializers.IntegerField()
+    business_element = serializers.CharField(
+        source='business_element__slug'
+    )
+    role = serializers.CharField()
+    get_list_permission = serializers.BooleanField()
+    create_obj_permission = serializers.BooleanField()
+    get_obj_permission = serializers.BooleanField()
+    update_obj_permission = serializers.BooleanField()
+    partial_update_obj_permission = serializers.BooleanField()
+    delete_obj_permission = serializers.BooleanField()
+    owner_permission = serializers.BooleanField()
+
+
+class PermissionCheckItemSerializer(serializers.Serializer):
+    """Сериализатор одной проверки права доступа пользователя."""
+
+    user_id = serializers.IntegerField(required=False)
+    email = serializers.EmailField(
+        max_length=USER_CONSTANTS['email'],
+        required=False
+    )
+    slug = serializers.CharField(max_length=PERMISSIONS_CONSTANTS['names'])
+    action = serializers.ChoiceField(choices=list(PERMISSION_ACTIONS))
+
+    def validate(self, attrs):
+        """Пользователь задается либо user_id, либо email."""
+        if ('user_id' in attrs) == ('email' in attrs):
+            raise serializers.ValidationError(
+                'Укажите либо \'user_id\', либо \'email\' пользователя.'
+            )
+        return attrs
+
+
+class PermissionCheckSerializer(serializers.Serializer):
+    """Сериализатор массовой проверки прав доступа."""
+
+    checks = PermissionCheckItemSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=PERMISSIONS_CHECK_LIMIT
+    )
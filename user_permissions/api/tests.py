@@ -0,0 +1,119 @@
+"""Тесты API: отзыв ролей, пагинация списков и бюджеты SQL-запросов."""
+from http import HTTPStatus
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from . import async_views
+from .budgets import QueryBudgetExceeded
+from .views import RolesViewSet
+from permissions.matrix import permission_matrix
+from users.constants import ROLE_GUEST, ROLE_USER
+from users.models import Roles, User
+
+
+ROLES_URL = '/api/v1/users/role/'
+ASYNC_LOGIN_URL = '/api/v1/async/auth/login/'
+
+
+class ApiTestCase(TestCase):
+    """Клиент API от имени администратора."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin@mail.ru', 'test2025')
+        cls.user = User.objects.create_user('user@mail.ru', 'test2025')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        # Матрица прав загружается после ответа и общая для процесса.
+        self.addCleanup(permission_matrix.invalidate)
+
+
+class RevokeRolesTests(ApiTestCase):
+    """У пользователя нельзя отозвать последнюю роль."""
+
+    def test_destroy_last_role(self):
+        role = Roles.objects.get(user=self.user)
+        response = self.client.delete(f'{ROLES_URL}{role.pk}/')
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertTrue(Roles.objects.filter(pk=role.pk).exists())
+
+    def test_bulk_delete_last_role(self):
+        response = self.client.post(f'{ROLES_URL}bulk-delete/', {
+            'roles': [{'user': self.user.email, 'role': ROLE_GUEST}],
+        }, format='json')
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertEqual(response.json()['users'], [self.user.email])
+        self.assertTrue(Roles.objects.filter(user=self.user).exists())
+
+    def test_bulk_delete(self):
+        Roles.objects.create(user=self.user, role=ROLE_USER)
+        response = self.client.post(f'{ROLES_URL}bulk-delete/', {
+            'roles': [{'user': self.user.email, 'role': ROLE_GUEST}],
+        }, format='json')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.json(), {'count': 1})
+        self.assertEqual(
+            list(Roles.objects.filter(user=self.user).values_list(
+                'role', flat=True
+            )),
+            [ROLE_USER]
+        )
+
+
+class ListPaginationTests(ApiTestCase):
+    """Номера страниц по умолчанию, курсор по параметру cursor."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for number in range(10):
+            User.objects.create_user(f'user{number}@mail.ru', 'test2025')
+
+    def get_ids(self, response):
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return [role['role_id'] for role in response.json()['results']]
+
+    def test_page_numbers(self):
+        first = self.get_ids(self.client.get(ROLES_URL))
+        second = self.get_ids(self.client.get(f'{ROLES_URL}?page=2'))
+        self.assertEqual(len(first), 5)
+        self.assertEqual(len(second), 5)
+        self.assertFalse(set(first) & set(second))
+        response = self.client.get(f'{ROLES_URL}?page=4')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_cursor(self):
+        response = self.client.get(f'{ROLES_URL}?cursor=&page_size=7')
+        first = self.get_ids(response)
+        self.assertEqual(response.json()['count'], 12)
+        self.assertIn('cursor=', response.json()['next'])
+        second = self.get_ids(self.client.get(response.json()['next']))
+        self.assertEqual(first + second, sorted(
+            Roles.objects.values_list('pk', flat=True)
+        ))
+
+
+class QueryBudgetTests(ApiTestCase):
+    """Превышение бюджета в тестовых настройках выбрасывает исключение."""
+
+    def test_sync_view(self):
+        self.client.get(ROLES_URL)
+        with mock.patch.object(RolesViewSet, 'query_budget', {'list': 1}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(ROLES_URL)
+
+    async def test_async_view(self):
+        data = {'email': 'user@mail.ru', 'password': 'test2025'}
+        response = await self.async_client.post(
+            ASYNC_LOGIN_URL, data, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        with mock.patch.object(async_views.login_view, 'query_budget', 0):
+            with self.assertRaises(QueryBudgetExceeded):
+                await self.async_client.post(
+                    ASYNC_LOGIN_URL, data, content_type='application/json'
+                )
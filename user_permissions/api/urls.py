@@ -4,19 +4,24 @@ from rest_framework_simplejwt.views import TokenRefreshView
 
 from .constants import API_VERSION
 from .views import (
+    APIRootView,
     BusinessElementsViewSet,
     logout_view,
     login_view,
+    metrics_view,
+    permissions_check_view,
     PermissionsViewSet,
     registration_view,
     RolesViewSet,
     soft_delete_view,
     user_update_view
 )
+from api import async_views
 from api.mock_views import mock_view
 
 
 router_v1 = DefaultRouter()
+router_v1.APIRootView = APIRootView
 router_v1.register(r'users/role', RolesViewSet)
 router_v1.register(r'applications', BusinessElementsViewSet)
 router_v1.register(r'permissions', PermissionsViewSet)
@@ -36,6 +41,27 @@ urlpatterns = [
         soft_delete_view,
         name='soft_delete_user'
     ),
+    path(
+        f'{API_VERSION}/permissions/check/',
+        permissions_check_view,
+        name='permissions_check'
+    ),
     path(f'{API_VERSION}/', include(router_v1.urls)),
     path(f'{API_VERSION}/mock-view/', mock_view, name='mock-view'),
+    path(f'{API_VERSION}/metrics/', metrics_view, name='metrics'),
+    path(
+        f'{API_VERSION}/async/auth/login/',
+        async_views.login_view,
+        name='async_login'
+    ),
+    path(
+        f'{API_VERSION}/async/users/me/',
+        async_views.user_update_view,
+        name='async_edit_user'
+    ),
+    path(
+        f'{API_VERSION}/async/permissions/check/',
+        async_views.permissions_check_view,
+        name='async_permissions_check'
+    ),
 ]
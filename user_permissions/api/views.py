@@ -1,43 +1,71 @@
 from http import HTTPStatus
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from rest_framework import viewsets
-from rest_framework.decorators import api_view, permission_classes
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+from rest_framework import routers, viewsets
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.filters import SearchFilter
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.serializers import ValidationError
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework_simplejwt.token_blacklist.models import (
-    OutstandingToken,
-    BlacklistedToken
-)
 
+from .budgets import query_budget
+from .constants import METRICS_CONTENT_TYPE
+from .filters import IndexedSearchFilter
+from .pagination import ListPagination
 from .serializers import (
     BusinessElementsSerializer,
+    PermissionCheckSerializer,
+    PermissionsListSerializer,
     PermissionsSerializer,
+    RolesBulkSerializer,
+    RolesListSerializer,
     RolesSerializer,
     UsersLoginSerializer,
     UserSerializer,
     UsersRegistrationSerializer
 )
+from permissions import engine
+from permissions.constants import APP_NAME as PERMISSIONS_APP_NAME
+from permissions.constants import (
+    PERMISSIONS_CHECK_METHODS,
+    PERMISSIONS_ROLES_METHODS
+)
+from permissions.filters import OwnerFilter
+from permissions.metrics import registry
 from permissions.models import BusinessElements, Permissions
-from permissions.permissions import IsAuthenticatedAndAdminPermissions
+from permissions.registry import permission_rule
+from users.authentication import get_user_instance
 from users.constants import (
+    APP_NAME,
+    ROLE_ADMIN,
     USER_LOGIN_REGISTER_DELETE,
     USER_ROLES_METHODS,
     USER_UPDATE_METHODS_LIST
 )
 from users.models import Roles
-from users.permissions import (
-    IsAuthenticatedAndAdminUsers,
-    IsAuthenticatedAndRolesUsers
+from users.services import (
+    assign_roles,
+    blacklist_token,
+    deactivate_users,
+    revoke_roles
 )
+from users.tokens import RolesRefreshToken
+from users.utils import get_setting
 
 
 User = get_user_model()
 
 
+@query_budget(8)
 @api_view(USER_LOGIN_REGISTER_DELETE)
 @permission_classes([AllowAny])
 def registration_view(request):
@@ -52,6 +80,7 @@ def registration_view(request):
     return Response(serializer.validated_data, status=HTTPStatus.OK)
 
 
+@query_budget(3)
 @api_view(USER_LOGIN_REGISTER_DELETE)
 @permission_classes([AllowAny])
 def login_view(request):
@@ -65,8 +94,7 @@ def login_view(request):
         serializer.is_valid(raise_exception=True)
     except ValidationError:
         return Response(serializer.errors, status=HTTPStatus.BAD_REQUEST)
-    user = User.objects.get(email=serializer.validated_data['email'])
-    token = RefreshToken.for_user(user)
+    token = RolesRefreshToken.for_user(serializer.validated_data['user'])
     return Response(
         {
             'refresh': str(token),
@@ -76,15 +104,17 @@ def login_view(request):
     )
 
 
+@permission_rule(APP_NAME, methods=USER_UPDATE_METHODS_LIST)
+@query_budget(3)
 @api_view(USER_UPDATE_METHODS_LIST)
-@permission_classes([IsAuthenticatedAndRolesUsers])
 def user_update_view(request):
     """Функция обработки запросов через эндпоинт /users/me/."""
+    user = get_user_instance(request.user)
     if request.method == 'GET':
-        serializer = UserSerializer(request.user)
+        serializer = UserSerializer(user)
         return Response(serializer.data)
     serializer = UserSerializer(
-        request.user,
+        user,
         data=request.data,
         partial=True
     )
@@ -93,23 +123,21 @@ def user_update_view(request):
     return Response(serializer.data)
 
 
+@permission_rule(APP_NAME, methods=USER_LOGIN_REGISTER_DELETE)
+@query_budget(6)
 @api_view(USER_LOGIN_REGISTER_DELETE)
-@permission_classes([IsAuthenticatedAndRolesUsers])
 def soft_delete_view(request):
     """Функция для мягкого удаления пользователя."""
-    request.user.is_active = False
-    request.user.save()
-    tokens = OutstandingToken.objects.filter(user_id=request.user.id)
-    for token in tokens:
-        t, _ = BlacklistedToken.objects.get_or_create(token=token)
+    deactivate_users([request.user.id])
     return Response(
         {'detail': f'User {request.user.email} удален. '
          'Все токены заблокированы.'},
         status=HTTPStatus.OK)
 
 
+@permission_rule(APP_NAME, methods=USER_LOGIN_REGISTER_DELETE)
+@query_budget(4)
 @api_view(USER_LOGIN_REGISTER_DELETE)
-@permission_classes([IsAuthenticatedAndRolesUsers])
 def logout_view(request):
     """Действия в случае Logout.
 
@@ -119,52 +147,232 @@ def logout_view(request):
         raise ValidationError(
             {'refresh': 'Не указан refresh токен в запросе.'}
         )
-    token = OutstandingToken.objects.get(token=request.data['refresh'])
-    t, _ = BlacklistedToken.objects.get_or_create(token=token)
+    try:
+        token = RefreshToken(request.data['refresh'])
+    except TokenError as error:
+        raise ValidationError({'refresh': str(error)})
+    blacklist_token(token[api_settings.JTI_CLAIM])
     return Response(status=HTTPStatus.OK)
 
 
-class RolesViewSet(viewsets.ModelViewSet):
+@permission_rule(
+    PERMISSIONS_APP_NAME, methods=PERMISSIONS_CHECK_METHODS,
+    actions={'POST': 'get_list'}
+)
+@query_budget(3)
+@api_view(PERMISSIONS_CHECK_METHODS)
+def permissions_check_view(request):
+    """Массовая проверка прав доступа пользователей.
+
+    Принимает список проверок (user_id или email, slug приложения,
+    действие) и возвращает решение по каждой из них. Запрос только
+    читает права доступа, поэтому POST проверяется как право на
+    получение списка объектов.
+    """
+    serializer = PermissionCheckSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    checks = serializer.validated_data['checks']
+    decisions = engine.check_users(
+        (item.get('user_id', item.get('email')), item['slug'], item['action'])
+        for item in checks
+    )
+    return Response(
+        {
+            'results': [
+                {**item, 'allowed': allowed}
+                for item, allowed in zip(checks, decisions)
+            ]
+        },
+        status=HTTPStatus.OK
+    )
+
+
+@query_budget(0)
+@require_GET
+def metrics_view(request):
+    """Метрики процесса в текстовом формате Prometheus.
+
+    Представление не проходит аутентификацию DRF. Если задана настройка
+    METRICS_TOKEN, запрос должен передать ее в заголовке
+    Authorization: Bearer <токен>. Без токена метрики отдаются только
+    при DEBUG или METRICS_PUBLIC=True, иначе ответ 401.
+    """
+    token = get_setting('METRICS_TOKEN')
+    if token:
+        allowed = constant_time_compare(
+            request.headers.get('Authorization', ''), f'Bearer {token}'
+        )
+    else:
+        allowed = settings.DEBUG or get_setting('METRICS_PUBLIC')
+    if not allowed:
+        return HttpResponse(status=HTTPStatus.UNAUTHORIZED)
+    return HttpResponse(
+        registry.render(), content_type=METRICS_CONTENT_TYPE
+    )
+
+
+class APIRootView(routers.APIRootView):
+    """Корень API: список маршрутов доступен без проверки прав."""
+
+    permission_classes = [AllowAny]
+
+
+class AtomicWriteMixin:
+    """Запись объекта и увеличение версии прав в одной транзакции.
+
+    Обработчики сигналов моделей прав увеличивают версию прав
+    (см. permissions.coherence), поэтому запись и версия фиксируются
+    вместе.
+    """
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            super().perform_create(serializer)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            super().perform_update(serializer)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            super().perform_destroy(instance)
+
+
+class ValuesListMixin:
+    """Список объектов одним запросом через values() без моделей.
+
+    Для action list queryset превращается в values() с полями
+    list_serializer_class.values_fields, а строки сериализуются
+    list_serializer_class. Остальные действия, в том числе запись,
+    используют serializer_class с прежней валидацией.
+    """
+
+    list_serializer_class = None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            return queryset.values(*self.list_serializer_class.values_fields)
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return self.list_serializer_class
+        return super().get_serializer_class()
+
+
+@permission_rule(APP_NAME, methods=USER_ROLES_METHODS, roles=(ROLE_ADMIN,))
+class RolesViewSet(
+    AtomicWriteMixin, ValuesListMixin, viewsets.ModelViewSet
+):
     """ViewSet для ролей пользователя."""
 
-    queryset = Roles.objects.all()
+    queryset = Roles.objects.select_related('user')
     serializer_class = RolesSerializer
-    permission_classes = [IsAuthenticatedAndAdminUsers]
-    filter_backends = [SearchFilter]
+    list_serializer_class = RolesListSerializer
+    pagination_class = ListPagination
+    filter_backends = [OwnerFilter, IndexedSearchFilter]
     search_fields = ['user__email']
     http_method_names = USER_ROLES_METHODS
+    permission_actions = {'bulk_delete': 'delete_obj'}
+    query_budget = {
+        'list': 5,
+        'retrieve': 3,
+        'create': 10,
+        'partial_update': 9,
+        'destroy': 8,
+        'bulk_assign': 8,
+        'bulk_delete': 10,
+    }
 
     def destroy(self, request, *args, **kwargs):
         """Проверки перед удалением роли.."""
-        if Roles.objects.filter(user=self.get_object().user).count() == 1:
+        instance = self.get_object()
+        user = instance.user
+        if Roles.objects.filter(user=user).count() == 1:
             raise ValidationError(
                 {'role': 'У пользователя должна быть хотя бы одна роль.'}
             )
-        if self.get_object().user.is_active is False:
+        if user.is_active is False:
             raise ValidationError(
                 {'role': 'Данный аккаунт был удален.'}
             )
-        return super().destroy(request, *args, **kwargs)
+        self.perform_destroy(instance)
+        return Response(status=HTTPStatus.NO_CONTENT)
 
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_assign(self, request):
+        """Массовое назначение ролей пользователям."""
+        serializer = RolesBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        count = assign_roles(
+            (item['user_id'], item['role'])
+            for item in serializer.validated_data['roles']
+        )
+        return Response({'count': count}, status=HTTPStatus.OK)
 
-class BusinessElementsViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['post'], url_path='bulk-delete')
+    def bulk_delete(self, request):
+        """Массовый отзыв ролей у пользователей."""
+        serializer = RolesBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        roles = serializer.validated_data['roles']
+        try:
+            count = revoke_roles(
+                (item['user_id'], item['role']) for item in roles
+            )
+        except DjangoValidationError as error:
+            emails = {item['user_id']: item['user'] for item in roles}
+            raise ValidationError({
+                'role': error.messages,
+                'users': [emails[pk] for pk in error.params['user_ids']]
+            })
+        return Response({'count': count}, status=HTTPStatus.OK)
+
+
+@permission_rule(
+    PERMISSIONS_APP_NAME, methods=PERMISSIONS_ROLES_METHODS,
+    roles=(ROLE_ADMIN,)
+)
+class BusinessElementsViewSet(AtomicWriteMixin, viewsets.ModelViewSet):
     """ViewSet для ролей названия приложений."""
 
     queryset = BusinessElements.objects.all()
     serializer_class = BusinessElementsSerializer
-    permission_classes = [IsAuthenticatedAndAdminPermissions]
+    pagination_class = ListPagination
     filter_backends = [SearchFilter]
     search_fields = ['name', 'slug']
     lookup_field = 'slug'
-    http_method_names = ['get', 'post', 'patch', 'delete']
+    http_method_names = PERMISSIONS_ROLES_METHODS
+    query_budget = {
+        'list': 5,
+        'retrieve': 3,
+        'create': 5,
+        'partial_update': 5,
+        'destroy': 6,
+    }
 
 
-class PermissionsViewSet(viewsets.ModelViewSet):
+@permission_rule(
+    PERMISSIONS_APP_NAME, methods=PERMISSIONS_ROLES_METHODS,
+    roles=(ROLE_ADMIN,)
+)
+class PermissionsViewSet(
+    AtomicWriteMixin, ValuesListMixin, viewsets.ModelViewSet
+):
     """ViewSet для ролей названия приложений."""
 
-    queryset = Permissions.objects.all()
+    queryset = Permissions.objects.select_related('business_element')
     serializer_class = PermissionsSerializer
-    permission_classes = [IsAuthenticatedAndAdminPermissions]
+    list_serializer_class = PermissionsListSerializer
+    pagination_class = ListPagination
     filter_backends = [SearchFilter]
     search_fields = ['business_element', 'role']
-    http_method_names = ['get', 'post', 'patch', 'delete']
+    http_method_names = PERMISSIONS_ROLES_METHODS
+    query_budget = {
+        'list': 5,
+        'retrieve': 3,
+        'create': 7,
+        'partial_update': 5,
+        'destroy': 5,
+    }
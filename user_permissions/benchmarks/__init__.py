@@ -0,0 +1,13 @@
+"""Нагрузочные замеры API в одном процессе.
+
+Запуск из каталога с manage.py:
+
+    python -m benchmarks --users 1000 --iterations 50
+
+Замеры выполняются на отдельной тестовой базе данных, которая создается
+миграциями и заполняется синтетическими данными (см. dataset), а затем
+удаляется. Для каждого маршрута api/urls.py (см. scenarios) считаются
+p50/p95/p99 времени ответа, запросы в секунду и SQL-запросы на запрос.
+Результаты можно сохранить как базовые и сравнивать с ними следующие
+запуски (см. runner).
+"""
@@ -0,0 +1,165 @@
+"""Запуск замеров: python -m benchmarks --help."""
+import argparse
+import logging
+import os
+import platform
+import sys
+from pathlib import Path
+
+import django
+
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Замеры времени ответа и числа SQL-запросов API.'
+    )
+    parser.add_argument(
+        '--users', type=int, default=1000,
+        help='Число синтетических пользователей (не меньше 300).'
+    )
+    parser.add_argument(
+        '--elements', type=int, default=50,
+        help='Число дополнительных приложений в BusinessElements.'
+    )
+    parser.add_argument(
+        '--iterations', type=int, default=50,
+        help='Число замеряемых запросов на сценарий.'
+    )
+    parser.add_argument(
+        '--heavy-iterations', type=int, default=3,
+        help='Число запросов для сценариев с хешированием пароля.'
+    )
+    parser.add_argument(
+        '--warmup', type=int, default=2,
+        help='Число незамеряемых запросов перед сценарием.'
+    )
+    parser.add_argument(
+        '--scenario', action='append', default=[],
+        help='Выполнить только сценарии с этим префиксом имени.'
+    )
+    parser.add_argument(
+        '--baseline', type=Path, default=DEFAULT_BASELINE,
+        help='Файл базовых результатов.'
+    )
+    parser.add_argument(
+        '--save-baseline', action='store_true',
+        help='Сохранить результаты как базовые вместо сравнения.'
+    )
+    parser.add_argument(
+        '--output', type=Path,
+        help='Сохранить результаты запуска в JSON-файл.'
+    )
+    parser.add_argument(
+        '--threshold', type=float, default=0.25,
+        help='Допустимый рост p95 относительно базовых результатов.'
+    )
+    parser.add_argument(
+        '--min-delta', type=float, default=1.0,
+        help='Рост p95 в миллисекундах, меньше которого не регрессия.'
+    )
+    args = parser.parse_args(argv)
+    if args.users < 300:
+        parser.error('--users должно быть не меньше 300.')
+    if min(args.iterations, args.heavy_iterations) < 2:
+        parser.error('Для процентилей нужно не меньше 2 запросов.')
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    os.environ.setdefault(
+        'DJANGO_SETTINGS_MODULE', 'user_permissions.settings'
+    )
+    django.setup()
+
+    from django.conf import settings
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import override_settings, setup_test_environment
+
+    from permissions.coherence import version_watcher
+    from permissions.matrix import permission_matrix
+    from users.cache import user_state_cache
+
+    from . import runner
+    from .dataset import seed
+    from .scenarios import SCENARIOS, Context
+
+    scenarios = [
+        scenario for scenario in SCENARIOS
+        if not args.scenario or scenario.name.startswith(tuple(args.scenario))
+    ]
+    setup_test_environment()
+    # Ответы 403 и 404 ожидаемы в сценариях, их предупреждения не нужны.
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    # Кэши прав процесса могли быть загружены из снимка рабочей базы.
+    permission_matrix.invalidate()
+    user_state_cache.clear()
+    version_watcher.reset()
+    # Журнал аудита пишет в базу из фонового потока, его подключение
+    # помешало бы удалить тестовую базу. Превышение бюджета SQL-запросов
+    # представления прерывает замер. Метрики замеряются без токена.
+    audit_settings = override_settings(USER_PERMISSIONS={
+        **getattr(settings, 'USER_PERMISSIONS', {}),
+        'AUDIT_SINK': None,
+        'QUERY_BUDGET_RAISE': True,
+        'METRICS_TOKEN': None,
+        'METRICS_PUBLIC': True,
+    })
+    audit_settings.enable()
+    try:
+        dataset = seed(args.users, args.elements)
+        context = Context(dataset)
+        client = Client()
+        results = {}
+        for scenario in scenarios:
+            iterations = (
+                args.heavy_iterations if scenario.heavy else args.iterations
+            )
+            results[scenario.name] = runner.run_scenario(
+                client, context, scenario, iterations, args.warmup
+            )
+            print(f'{scenario.name}: готово', file=sys.stderr)
+    finally:
+        audit_settings.disable()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print(runner.format_table(results))
+    meta = {
+        'users': args.users,
+        'elements': args.elements,
+        'iterations': args.iterations,
+        'heavy_iterations': args.heavy_iterations,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+    }
+    if args.output:
+        runner.save_results(args.output, results, meta)
+    if args.save_baseline:
+        runner.save_results(args.baseline, results, meta)
+        print(f'Базовые результаты сохранены в {args.baseline}.')
+        return 0
+    if not args.baseline.exists():
+        print(
+            f'Нет базовых результатов {args.baseline}, '
+            'запустите с --save-baseline.'
+        )
+        return 0
+    regressions = runner.compare(
+        results, runner.load_baseline(args.baseline), args.threshold,
+        args.min_delta
+    )
+    for regression in regressions:
+        print(f'РЕГРЕССИЯ {regression}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
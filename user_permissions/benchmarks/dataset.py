@@ -0,0 +1,117 @@
+"""Синтетические данные для замеров."""
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from permissions.coherence import version_watcher
+from permissions.constants import AUTHZ_SCOPE_PERMISSIONS, PERMISSION_ACTIONS
+from permissions.matrix import permission_matrix
+from permissions.models import BusinessElements, Permissions
+from users.constants import ROLE_ADMIN, ROLE_GUEST, ROLE_MANAGER, ROLE_USER
+from users.models import User
+from users.services import assign_roles, create_users
+
+
+PASSWORD = 'benchmark-2025'
+EMAIL_TEMPLATE = 'bench_{}@example.com'
+
+# Права приложений проекта по ролям, как в демонстрационной базе.
+GRANTS = {
+    'users': {
+        ROLE_GUEST: ('get_list', 'create_obj', 'partial_update_obj'),
+        ROLE_USER: ('get_list', 'create_obj', 'partial_update_obj'),
+        ROLE_MANAGER: (
+            'get_list', 'create_obj', 'get_obj', 'update_obj',
+            'partial_update_obj'
+        ),
+        ROLE_ADMIN: tuple(PERMISSION_ACTIONS),
+    },
+    'permissions': {
+        ROLE_ADMIN: tuple(PERMISSION_ACTIONS),
+    },
+    'mock': {
+        ROLE_GUEST: ('get_list',),
+        ROLE_USER: ('get_list', 'create_obj', 'update_obj'),
+        ROLE_MANAGER: (
+            'get_list', 'create_obj', 'get_obj', 'update_obj',
+            'partial_update_obj'
+        ),
+        ROLE_ADMIN: tuple(PERMISSION_ACTIONS),
+    },
+}
+# Роль и шаг, с которым она назначается пользователям.
+ROLE_SHARES = ((ROLE_USER, 2), (ROLE_MANAGER, 10), (ROLE_ADMIN, 100))
+
+
+class Dataset:
+    """Созданные данные: пользователи по ролям и число объектов."""
+
+    def __init__(self, users: int, elements: int):
+        self.users = users
+        self.elements = elements
+        self.role_users = {}
+
+    def email(self, index: int) -> str:
+        return EMAIL_TEMPLATE.format(index)
+
+
+def _permission(element, role, actions):
+    return Permissions(
+        business_element=element,
+        role=role,
+        **{
+            field: action in actions
+            for action, field in PERMISSION_ACTIONS.items()
+        }
+    )
+
+
+@transaction.atomic
+def seed(users: int, elements: int) -> Dataset:
+    """Создает users пользователей и elements дополнительных приложений.
+
+    Все пользователи получают роль гостя, каждый второй - роль user,
+    каждый десятый - manager, каждый сотый - admin (ROLE_SHARES).
+    Пароль у всех один (PASSWORD) и хешируется один раз. Для каждой роли
+    запоминается один пользователь, от имени которого выполняются
+    запросы.
+    """
+    dataset = Dataset(users, elements)
+    encoded = make_password(PASSWORD)
+    create_users(
+        ({'email': dataset.email(index), 'password': PASSWORD}
+         for index in range(users)),
+        hash_passwords=lambda passwords: [encoded] * len(passwords),
+    )
+    ids = dict(User.objects.filter(
+        email__startswith='bench_'
+    ).values_list('email', 'id'))
+    pairs = []
+    for role, share in ROLE_SHARES:
+        role_ids = [
+            ids[dataset.email(index)] for index in range(0, users, share)
+        ]
+        pairs.extend((user_id, role) for user_id in role_ids)
+    assign_roles(pairs)
+    # У пользователя 1 только роль гостя, у пользователя с номером share
+    # есть соответствующая роль.
+    dataset.role_users[ROLE_GUEST] = dataset.email(1)
+    for role, share in ROLE_SHARES:
+        dataset.role_users[role] = dataset.email(share)
+
+    slugs = [*GRANTS, *(f'bench-{index}' for index in range(elements))]
+    BusinessElements.objects.bulk_create([
+        BusinessElements(name=slug, slug=slug) for slug in slugs
+    ])
+    permissions = []
+    for element in BusinessElements.objects.filter(slug__in=slugs):
+        grants = GRANTS.get(
+            element.slug, {ROLE_ADMIN: tuple(PERMISSION_ACTIONS)}
+        )
+        permissions.extend(
+            _permission(element, role, actions)
+            for role, actions in grants.items()
+        )
+    Permissions.objects.bulk_create(permissions)
+    version_watcher.bump(AUTHZ_SCOPE_PERMISSIONS)
+    transaction.on_commit(permission_matrix.invalidate)
+    return dataset
@@ -0,0 +1,109 @@
+"""Выполнение сценариев и сравнение с базовыми результатами."""
+import json
+import statistics
+from time import perf_counter
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+
+RESULT_FIELDS = ('p50', 'p95', 'p99', 'rps', 'queries')
+
+
+def percentile(quantiles, value: int) -> float:
+    """Значение процентиля по списку из 99 границ statistics.quantiles."""
+    return quantiles[value - 1]
+
+
+def run_scenario(client: Client, context, scenario, iterations, warmup):
+    """Выполняет сценарий и возвращает его показатели.
+
+    Время ответа приводится в миллисекундах, SQL-запросы - медиана на
+    один запрос. Первые warmup запросов не учитываются.
+    """
+    timings, queries = [], []
+    for index in range(warmup + iterations):
+        request = scenario.prepare(context, index)
+        kwargs = context.headers(request.role)
+        if request.data is not None:
+            kwargs.update(data=request.data, content_type='application/json')
+        with CaptureQueriesContext(connection) as captured:
+            start = perf_counter()
+            response = getattr(client, request.method)(request.path, **kwargs)
+            elapsed = perf_counter() - start
+        if response.status_code != request.expected:
+            raise AssertionError(
+                f'{scenario.name}: {request.method.upper()} {request.path} '
+                f'вернул {response.status_code} вместо {request.expected}: '
+                f'{response.content[:300]!r}'
+            )
+        if index >= warmup:
+            timings.append(elapsed)
+            queries.append(len(captured))
+    quantiles = statistics.quantiles(
+        [timing * 1000 for timing in timings], n=100, method='inclusive'
+    )
+    return {
+        'iterations': iterations,
+        'p50': round(percentile(quantiles, 50), 3),
+        'p95': round(percentile(quantiles, 95), 3),
+        'p99': round(percentile(quantiles, 99), 3),
+        'rps': round(iterations / sum(timings), 1),
+        'queries': statistics.median_low(queries),
+    }
+
+
+def compare(
+    results: dict, baseline: dict, threshold: float, min_delta: float = 0
+) -> list[str]:
+    """Сравнивает результаты с базовыми и возвращает список регрессий.
+
+    Регрессия - рост p95 больше чем в 1 + threshold раз и больше чем на
+    min_delta миллисекунд или рост числа SQL-запросов на запрос.
+    Сценарии без базовых результатов не сравниваются.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['p95'] > max(
+            base['p95'] * (1 + threshold), base['p95'] + min_delta
+        ):
+            regressions.append(
+                f'{name}: p95 {result["p95"]} мс, было {base["p95"]} мс'
+            )
+        if result['queries'] > base['queries']:
+            regressions.append(
+                f'{name}: {result["queries"]} SQL-запросов, '
+                f'было {base["queries"]}'
+            )
+    return regressions
+
+
+def format_table(results: dict) -> str:
+    """Таблица результатов для вывода в консоль."""
+    width = max(len(name) for name in results)
+    lines = ['{:<{width}} {:>9} {:>9} {:>9} {:>8} {:>7}'.format(
+        'scenario', 'p50, ms', 'p95, ms', 'p99, ms', 'rps', 'queries',
+        width=width
+    )]
+    for name, result in results.items():
+        lines.append('{:<{width}} {:>9} {:>9} {:>9} {:>8} {:>7}'.format(
+            name, *(result[field] for field in RESULT_FIELDS), width=width
+        ))
+    return '\n'.join(lines)
+
+
+def load_baseline(path) -> dict:
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)['results']
+
+
+def save_results(path, results: dict, meta: dict):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(
+            {'meta': meta, 'results': results}, file,
+            ensure_ascii=False, indent=2
+        )
@@ -0,0 +1,408 @@
+"""Сценарии замеров: по одному на маршрут и метод api/urls.py.
+
+Сценарий - функция prepare(context, index), которая готовит данные для
+одного запроса (эта подготовка в замер не входит) и возвращает
+BenchmarkRequest. Сценарии с хешированием пароля помечены heavy: для
+них число повторений задается отдельно, так как один запрос стоит
+сотни миллисекунд.
+"""
+from itertools import count, cycle
+from typing import NamedTuple
+
+from django.contrib.auth.hashers import make_password
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .dataset import PASSWORD
+from permissions.matrix import permission_matrix
+from permissions.models import BusinessElements, Permissions
+from users.constants import ROLE_ADMIN, ROLE_GUEST, ROLE_MANAGER, ROLE_USER
+from users.models import Roles, User
+from users.services import assign_roles, create_users
+from users.tokens import RolesRefreshToken
+
+
+API = '/api/v1'
+CHECKS_PER_REQUEST = 100
+ROLES_PER_BULK = 20
+
+
+class BenchmarkRequest(NamedTuple):
+    """Один запрос сценария и ожидаемый код ответа."""
+
+    method: str
+    path: str
+    data: dict = None
+    role: str = None
+    expected: int = 200
+
+
+class Scenario(NamedTuple):
+    """Сценарий замера."""
+
+    name: str
+    prepare: object
+    heavy: bool = False
+
+
+SCENARIOS = []
+
+
+def scenario(name, heavy=False):
+    """Регистрирует функцию подготовки запроса как сценарий."""
+    def decorator(prepare):
+        SCENARIOS.append(Scenario(name, prepare, heavy))
+        return prepare
+    return decorator
+
+
+class Context:
+    """Общее состояние сценариев: данные, токены, счетчики имен."""
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self._counter = count()
+        self._encoded_password = make_password(PASSWORD)
+        self.users = {
+            role: User.objects.get(email=email)
+            for role, email in dataset.role_users.items()
+        }
+        self.refresh = {
+            role: RolesRefreshToken.for_user(user)
+            for role, user in self.users.items()
+        }
+        self.access = {
+            role: str(token.access_token)
+            for role, token in self.refresh.items()
+        }
+        # У пользователей с нечетными номерами только роль гостя.
+        guests = range(1, dataset.users, 2)
+        self._single_role_users = (dataset.email(index) for index in guests)
+        self._guest_users = cycle(
+            dataset.email(index) for index in reversed(guests)
+        )
+
+    def headers(self, role) -> dict:
+        if role is None:
+            return {}
+        return {'HTTP_AUTHORIZATION': f'Bearer {self.access[role]}'}
+
+    def authorize(self, name, user):
+        """Выдает токен доступа пользователю для запросов от имени name."""
+        self.access[name] = str(
+            RolesRefreshToken.for_user(user).access_token
+        )
+
+    def unique(self, prefix: str) -> str:
+        return f'{prefix}-{next(self._counter)}'
+
+    def single_role_user(self) -> str:
+        """Email еще не использованного пользователя с ролью гостя.
+
+        Сценарии, которые назначают роль user, берут каждого такого
+        пользователя один раз.
+        """
+        try:
+            return next(self._single_role_users)
+        except StopIteration:
+            raise RuntimeError(
+                'Недостаточно пользователей для сценария, увеличьте --users.'
+            )
+
+    def guest_user(self) -> str:
+        """Email пользователя для назначения и отзыва роли manager."""
+        return next(self._guest_users)
+
+    def new_user(self) -> User:
+        """Создает пользователя с ролью гостя вне замера."""
+        email = f'{self.unique("new")}@example.com'
+        create_users(
+            [{'email': email, 'password': PASSWORD}],
+            hash_passwords=lambda passwords: [self._encoded_password],
+        )
+        return User.objects.get(email=email)
+
+    def new_element(self) -> BusinessElements:
+        slug = self.unique('element')
+        return BusinessElements.objects.create(name=slug, slug=slug)
+
+
+@scenario('auth_signup', heavy=True)
+def auth_signup(context, index):
+    return BenchmarkRequest('post', f'{API}/auth/signup/', {
+        'email': f'{context.unique("signup")}@example.com',
+        'password': PASSWORD,
+        'password_confirm': PASSWORD,
+    })
+
+
+@scenario('auth_login', heavy=True)
+def auth_login(context, index):
+    return BenchmarkRequest('post', f'{API}/auth/login/', {
+        'email': context.users[ROLE_USER].email, 'password': PASSWORD
+    })
+
+
+@scenario('auth_token_refresh')
+def auth_token_refresh(context, index):
+    return BenchmarkRequest('post', f'{API}/auth/token/refresh/', {
+        'refresh': str(context.refresh[ROLE_USER])
+    })
+
+
+@scenario('auth_logout')
+def auth_logout(context, index):
+    refresh = RefreshToken.for_user(context.users[ROLE_USER])
+    return BenchmarkRequest(
+        'post', f'{API}/auth/logout/', {'refresh': str(refresh)}, ROLE_USER
+    )
+
+
+@scenario('users_me_get')
+def users_me_get(context, index):
+    return BenchmarkRequest('get', f'{API}/users/me/', role=ROLE_USER)
+
+
+@scenario('users_me_patch')
+def users_me_patch(context, index):
+    return BenchmarkRequest(
+        'patch', f'{API}/users/me/', {'first_name': f'Имя {index}'},
+        ROLE_USER
+    )
+
+
+@scenario('users_me_delete')
+def users_me_delete(context, index):
+    context.authorize('deleted', context.new_user())
+    return BenchmarkRequest('post', f'{API}/users/me/delete/', role='deleted')
+
+
+@scenario('permissions_check')
+def permissions_check(context, index):
+    dataset = context.dataset
+    return BenchmarkRequest('post', f'{API}/permissions/check/', {
+        'checks': [
+            {
+                'email': dataset.email(number % dataset.users),
+                'slug': 'mock',
+                'action': 'delete_obj',
+            }
+            for number in range(CHECKS_PER_REQUEST)
+        ]
+    }, ROLE_ADMIN)
+
+
+@scenario('roles_list')
+def roles_list(context, index):
+    return BenchmarkRequest('get', f'{API}/users/role/', role=ROLE_ADMIN)
+
+
+@scenario('roles_search')
+def roles_search(context, index):
+    return BenchmarkRequest(
+        'get', f'{API}/users/role/?search=bench_1', role=ROLE_ADMIN
+    )
+
+
+@scenario('roles_retrieve')
+def roles_retrieve(context, index):
+    role = Roles.objects.filter(user=context.users[ROLE_USER]).first()
+    return BenchmarkRequest(
+        'get', f'{API}/users/role/{role.pk}/', role=ROLE_ADMIN
+    )
+
+
+@scenario('roles_create')
+def roles_create(context, index):
+    return BenchmarkRequest('post', f'{API}/users/role/', {
+        'user': context.single_role_user(), 'role': ROLE_USER
+    }, ROLE_ADMIN, 201)
+
+
+@scenario('roles_update')
+def roles_update(context, index):
+    role = Roles.objects.get(
+        user__email=context.single_role_user(), role=ROLE_GUEST
+    )
+    return BenchmarkRequest(
+        'patch', f'{API}/users/role/{role.pk}/', {'role': ROLE_USER},
+        ROLE_ADMIN
+    )
+
+
+@scenario('roles_delete')
+def roles_delete(context, index):
+    role, _ = Roles.objects.get_or_create(
+        user=User.objects.get(email=context.guest_user()),
+        role=ROLE_MANAGER
+    )
+    return BenchmarkRequest(
+        'delete', f'{API}/users/role/{role.pk}/', role=ROLE_ADMIN,
+        expected=204
+    )
+
+
+def _bulk_roles(context):
+    return [
+        {'user': context.guest_user(), 'role': ROLE_MANAGER}
+        for _ in range(ROLES_PER_BULK)
+    ]
+
+
+@scenario('roles_bulk_assign')
+def roles_bulk_assign(context, index):
+    return BenchmarkRequest(
+        'post', f'{API}/users/role/bulk/', {'roles': _bulk_roles(context)},
+        ROLE_ADMIN
+    )
+
+
+@scenario('roles_bulk_delete')
+def roles_bulk_delete(context, index):
+    roles = _bulk_roles(context)
+    ids = dict(User.objects.filter(
+        email__in=[item['user'] for item in roles]
+    ).values_list('email', 'id'))
+    assign_roles((ids[item['user']], item['role']) for item in roles)
+    return BenchmarkRequest(
+        'post', f'{API}/users/role/bulk-delete/', {'roles': roles},
+        ROLE_ADMIN
+    )
+
+
+@scenario('applications_list')
+def applications_list(context, index):
+    return BenchmarkRequest('get', f'{API}/applications/', role=ROLE_ADMIN)
+
+
+@scenario('applications_retrieve')
+def applications_retrieve(context, index):
+    return BenchmarkRequest(
+        'get', f'{API}/applications/mock/', role=ROLE_ADMIN
+    )
+
+
+@scenario('applications_create')
+def applications_create(context, index):
+    slug = context.unique('application')
+    return BenchmarkRequest('post', f'{API}/applications/', {
+        'name': slug, 'slug': slug
+    }, ROLE_ADMIN, 201)
+
+
+@scenario('applications_update')
+def applications_update(context, index):
+    element = context.new_element()
+    return BenchmarkRequest(
+        'patch', f'{API}/applications/{element.slug}/',
+        {'name': f'{element.name} (изменено)'}, ROLE_ADMIN
+    )
+
+
+@scenario('applications_delete')
+def applications_delete(context, index):
+    element = context.new_element()
+    return BenchmarkRequest(
+        'delete', f'{API}/applications/{element.slug}/', role=ROLE_ADMIN,
+        expected=204
+    )
+
+
+@scenario('permissions_list')
+def permissions_list(context, index):
+    return BenchmarkRequest('get', f'{API}/permissions/', role=ROLE_ADMIN)
+
+
+@scenario('permissions_retrieve')
+def permissions_retrieve(context, index):
+    permission = Permissions.objects.filter(
+        business_element__slug='mock'
+    ).first()
+    return BenchmarkRequest(
+        'get', f'{API}/permissions/{permission.pk}/', role=ROLE_ADMIN
+    )
+
+
+@scenario('permissions_create')
+def permissions_create(context, index):
+    return BenchmarkRequest('post', f'{API}/permissions/', {
+        'business_element': context.new_element().slug,
+        'role': ROLE_USER,
+        'get_list_permission': True,
+    }, ROLE_ADMIN, 201)
+
+
+@scenario('permissions_update')
+def permissions_update(context, index):
+    permission = Permissions.objects.create(
+        business_element=context.new_element(), role=ROLE_USER
+    )
+    return BenchmarkRequest(
+        'patch', f'{API}/permissions/{permission.pk}/',
+        {'get_obj_permission': True}, ROLE_ADMIN
+    )
+
+
+@scenario('permissions_delete')
+def permissions_delete(context, index):
+    permission = Permissions.objects.create(
+        business_element=context.new_element(), role=ROLE_USER
+    )
+    return BenchmarkRequest(
+        'delete', f'{API}/permissions/{permission.pk}/', role=ROLE_ADMIN,
+        expected=204
+    )
+
+
+def _mock_scenario(method, role, expected=200):
+    @scenario(f'mock_view_{method}_{role}')
+    def prepare(context, index):
+        return BenchmarkRequest(
+            method, f'{API}/mock-view/', role=role, expected=expected
+        )
+    return prepare
+
+
+for _method in ('get', 'post', 'put', 'patch', 'delete'):
+    _mock_scenario(_method, ROLE_ADMIN)
+_mock_scenario('delete', ROLE_GUEST, 403)
+
+
+@scenario('mock_view_get_cold')
+def mock_view_get_cold(context, index):
+    """Запрос при не загруженной матрице прав, как первый в процессе.
+
+    В замер входит и загрузка матрицы после ответа (request_finished).
+    """
+    permission_matrix.invalidate()
+    return BenchmarkRequest('get', f'{API}/mock-view/', role=ROLE_USER)
+
+
+@scenario('async_auth_login', heavy=True)
+def async_auth_login(context, index):
+    return BenchmarkRequest('post', f'{API}/async/auth/login/', {
+        'email': context.users[ROLE_USER].email, 'password': PASSWORD
+    })
+
+
+@scenario('async_users_me_get')
+def async_users_me_get(context, index):
+    return BenchmarkRequest('get', f'{API}/async/users/me/', role=ROLE_USER)
+
+
+@scenario('async_users_me_patch')
+def async_users_me_patch(context, index):
+    return BenchmarkRequest(
+        'patch', f'{API}/async/users/me/', {'first_name': f'Имя {index}'},
+        ROLE_USER
+    )
+
+
+@scenario('async_permissions_check')
+def async_permissions_check(context, index):
+    request = permissions_check(context, index)
+    return request._replace(path=f'{API}/async/permissions/check/')
+
+
+@scenario('metrics')
+def metrics(context, index):
+    return BenchmarkRequest('get', f'{API}/metrics/')
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import BusinessElements, Permissions
+from .models import AuthorizationAudit, BusinessElements, Permissions
 
 
 @admin.register(BusinessElements)
@@ -23,7 +23,25 @@ class PermissionsAdmin(admin.ModelAdmin):
         'business_element__name', 'business_element__slug', 'role',
         'get_list_permission'
     )
+    list_select_related = ('business_element',)
     list_display_links = ('business_element__slug',)
     empty_value_display = '-пусто-'
     list_editable = ('role', 'get_list_permission')
     empty_value_display = '-пусто-'
+
+
+@admin.register(AuthorizationAudit)
+class AuthorizationAuditAdmin(admin.ModelAdmin):
+    """Журнал решений о доступе, только для чтения."""
+
+    list_display = (
+        'created_at', 'user_id', 'slug', 'action', 'allowed', 'latency_us'
+    )
+    list_filter = ('allowed', 'slug')
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -5,3 +5,8 @@ class PermissionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'permissions'
     verbose_name = 'Разрешения'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
+        from .registry import permission_registry
+        permission_registry.compile()
@@ -0,0 +1,242 @@
+"""Журнал решений проверки прав доступа.
+
+Классы разрешений и асинхронные представления записывают каждое решение
+(пользователь, приложение, действие, решение, время проверки) через
+record_decision в метрики и кольцевой буфер в памяти процесса:
+запись - это добавление кортежа в deque, запрос не ждет базу данных или
+диск. Фоновый поток забирает записи пачками по AUDIT_BATCH_SIZE и
+передает их приемнику, заданному настройкой AUDIT_SINK:
+
+* db - bulk_create в таблицу AuthorizationAudit;
+* jsonl - строки JSON в файл AUDIT_FILE с ротацией по размеру.
+
+Если приемник не успевает, буфер заполняется до AUDIT_BUFFER_SIZE и
+самые старые записи вытесняются новыми; число потерянных записей
+учитывается в счетчике dropped (см. AuditLog.stats). Поток запускается
+при первой записи, поэтому команды управления без проверок прав его не
+создают.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from time import perf_counter
+
+from django.db import connections, router
+
+from .constants import (
+    AUDIT_BATCH_SIZE,
+    AUDIT_BUFFER_SIZE,
+    AUDIT_FILE_BACKUP_COUNT,
+    AUDIT_FILE_MAX_BYTES,
+    AUDIT_FLUSH_INTERVAL,
+    AUDIT_SINK_DB,
+    AUDIT_SINK_JSONL
+)
+from .metrics import PERMISSION_CHECK_SECONDS, PERMISSION_DECISIONS
+from users.utils import get_setting
+
+
+logger = logging.getLogger(__name__)
+
+AUDIT_FIELDS = (
+    'created_at', 'user_id', 'slug', 'action', 'allowed', 'latency_us'
+)
+
+
+class DatabaseAuditSink:
+    """Запись пачки решений в таблицу AuthorizationAudit."""
+
+    def write(self, records):
+        from .models import AuthorizationAudit
+
+        connection = connections[router.db_for_write(AuthorizationAudit)]
+        # Поток живет дольше одного запроса: закрываем соединение,
+        # оборванное или превысившее CONN_MAX_AGE, как в конце запроса.
+        connection.close_if_unusable_or_obsolete()
+        AuthorizationAudit.objects.bulk_create([
+            AuthorizationAudit(
+                created_at=datetime.fromtimestamp(created, timezone.utc),
+                user_id=user_id,
+                slug=slug,
+                action=action,
+                allowed=allowed,
+                latency_us=latency_us,
+            )
+            for created, user_id, slug, action, allowed, latency_us
+            in records
+        ])
+
+
+class JsonlAuditSink:
+    """Запись пачки решений в файл JSONL с ротацией по размеру."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._handler = RotatingFileHandler(
+            path,
+            maxBytes=AUDIT_FILE_MAX_BYTES,
+            backupCount=AUDIT_FILE_BACKUP_COUNT,
+            encoding='utf-8',
+        )
+        self._handler.setFormatter(logging.Formatter('%(message)s'))
+
+    def write(self, records):
+        for created, *values in records:
+            message = json.dumps(dict(zip(AUDIT_FIELDS, (
+                datetime.fromtimestamp(created, timezone.utc).isoformat(),
+                *values
+            ))), ensure_ascii=False)
+            self._handler.emit(logging.makeLogRecord({'msg': message}))
+
+
+def get_audit_sink():
+    """Создает приемник журнала по настройке AUDIT_SINK или None."""
+    sink = get_setting('AUDIT_SINK')
+    if not sink:
+        return None
+    if sink == AUDIT_SINK_DB:
+        return DatabaseAuditSink()
+    if sink == AUDIT_SINK_JSONL:
+        return JsonlAuditSink(str(get_setting('AUDIT_FILE')))
+    raise ValueError(f'Неизвестный приемник журнала аудита: {sink}.')
+
+
+class AuditLog:
+    """Буфер решений о доступе и фоновый поток его выгрузки."""
+
+    def __init__(
+        self,
+        sink=None,
+        buffer_size=AUDIT_BUFFER_SIZE,
+        batch_size=AUDIT_BATCH_SIZE,
+        flush_interval=AUDIT_FLUSH_INTERVAL,
+    ):
+        self._sink = sink
+        self._configured = sink is not None
+        self._buffer = deque(maxlen=buffer_size)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    @property
+    def sink(self):
+        """Приемник журнала, создается по настройкам при первом обращении."""
+        if not self._configured:
+            self._sink = get_audit_sink()
+            self._configured = True
+        return self._sink
+
+    def record(self, user, slug, action, allowed, latency):
+        """Добавляет решение в буфер; latency - время проверки в секундах."""
+        if self.sink is None:
+            return
+        entry = (
+            time.time(),
+            getattr(user, 'pk', None),
+            slug,
+            action,
+            allowed,
+            int(latency * 1000000),
+        )
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append(entry)
+            self.recorded += 1
+            size = len(self._buffer)
+        self._ensure_started()
+        if size >= self._batch_size:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """Выгружает все записи буфера в приемник.
+
+        Возвращает число записанных решений. Пачка, которую приемник не
+        смог записать, отбрасывается и учитывается в счетчике failed.
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [
+                        self._buffer.popleft() for _ in range(
+                            min(self._batch_size, len(self._buffer))
+                        )
+                    ]
+                if not batch:
+                    return written
+                try:
+                    self.sink.write(batch)
+                except Exception:
+                    logger.exception(
+                        'Не удалось записать %s решений в журнал аудита.',
+                        len(batch)
+                    )
+                    with self._lock:
+                        self.failed += len(batch)
+                    return written
+                written += len(batch)
+                with self._lock:
+                    self.written += len(batch)
+
+    def stats(self) -> dict:
+        """Счетчики журнала для мониторинга."""
+        with self._lock:
+            return {
+                'recorded': self.recorded,
+                'written': self.written,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'buffered': len(self._buffer),
+            }
+
+    def _ensure_started(self):
+        # После fork поток родителя в дочернем процессе не работает,
+        # поэтому поток запускается заново в каждом процессе.
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name='authorization-audit', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self._flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+audit_log = AuditLog()
+atexit.register(audit_log.flush)
+
+
+def record_decision(user, slug, action, allowed, start) -> bool:
+    """Учитывает решение о доступе в метриках и журнале аудита.
+
+    start - значение perf_counter() перед проверкой. Возвращает allowed,
+    чтобы вызов можно было вернуть как результат проверки.
+    """
+    latency = perf_counter() - start
+    PERMISSION_CHECK_SECONDS.observe(latency, slug)
+    PERMISSION_DECISIONS.inc(slug, str(allowed).lower())
+    audit_log.record(user, slug, action, allowed, latency)
+    return allowed
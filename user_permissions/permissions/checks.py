@@ -0,0 +1,74 @@
+"""Системные проверки реестра правил доступа.
+
+Таблица правил (см. permissions.registry) проверяется без базы данных:
+у каждого представления DRF с RegistryPermission должно быть правило, а
+действия правил должны существовать. Наличие приложений правил в
+BusinessElements проверяется с тегом database, то есть командами
+check --database default и migrate.
+"""
+from django.core.checks import Error, Tags, Warning, register
+from django.db import DatabaseError
+
+from .constants import PERMISSION_ACTIONS
+from .registry import permission_registry
+
+
+def uses_registry_permission(view) -> bool:
+    """Проверяет, что представление DRF использует RegistryPermission."""
+    from .permissions import RegistryPermission
+
+    view_class = getattr(view, 'cls', None)
+    return view_class is not None and any(
+        issubclass(permission, RegistryPermission)
+        for permission in getattr(view_class, 'permission_classes', ())
+    )
+
+
+@register()
+def check_permission_rules(app_configs, **kwargs):
+    """Правила есть у всех представлений и ссылаются на известные действия."""
+    errors = []
+    for route, view, rule in permission_registry.routes:
+        if rule is None:
+            if uses_registry_permission(view):
+                errors.append(Error(
+                    f'У представления маршрута {route!r} нет правила '
+                    'доступа.',
+                    hint='Объявите правило декоратором permission_rule.',
+                    obj=view,
+                    id='permissions.E001',
+                ))
+            continue
+        unknown = set(rule.method_actions.values()) - set(PERMISSION_ACTIONS)
+        if unknown:
+            errors.append(Error(
+                f'Правило маршрута {route!r} ссылается на неизвестные '
+                f'действия: {", ".join(sorted(unknown))}.',
+                obj=view,
+                id='permissions.E002',
+            ))
+    return errors
+
+
+@register(Tags.database)
+def check_rule_business_elements(app_configs, **kwargs):
+    """Приложения правил реестра есть в BusinessElements."""
+    from .models import BusinessElements
+
+    try:
+        existing = set(BusinessElements.objects.filter(
+            slug__in=permission_registry.slugs
+        ).values_list('slug', flat=True))
+    except DatabaseError:
+        # Таблица еще не создана: проверка до первой миграции.
+        return []
+    return [
+        Warning(
+            f'Приложение {slug!r} из реестра правил доступа нет в '
+            'BusinessElements, запросы к его представлениям будут '
+            'разрешены только администраторам.',
+            hint='Создайте приложение через /api/v1/applications/.',
+            id='permissions.W001',
+        )
+        for slug in sorted(permission_registry.slugs - existing)
+    ]
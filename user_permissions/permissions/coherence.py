@@ -0,0 +1,367 @@
+"""Согласование кэшей прав доступа между процессами.
+
+Каждый процесс держит в памяти матрицу прав (permissions.matrix) и
+состояние пользователей (users.cache). Изменения в своем процессе
+применяются сразу после фиксации транзакции, а остальные процессы
+узнают о них по версиям:
+
+* у каждой области (AUTHZ_SCOPES) есть строка AuthorizationVersion, ее
+  версия увеличивается в той же транзакции, что и изменение данных, один
+  раз за транзакцию (VersionWatcher.bump);
+* после фиксации транзакции изменение публикуется в канал;
+* перед запросом процесс сверяет версии канала с последними увиденными,
+  но не чаще раза в poll_interval секунд, и для изменившихся областей
+  вызывает обработчики сброса кэша.
+
+Для областей, подключенных с функцией evict (например, состояние
+пользователей), bump принимает ключи изменившихся записей кэша. Канал
+хранит их в журнале изменений, и процесс сбрасывает только эти записи.
+Весь кэш области сбрасывается при первой сверке, при изменении без
+ключей и если нужная часть журнала уже удалена.
+
+Канал задается настройкой AUTHZ_CHANNEL: db - опрос таблицы версий
+одним SELECT не чаще раза в AUTHZ_POLL_INTERVAL секунд и журнал
+AuthorizationChange, locmem - версии и журнал в памяти процесса для
+тестов, либо путь к классу с методами publish(scope, keys) и poll() и
+атрибутом poll_interval (например, для pub/sub брокера). Методы
+record(scope, keys, using) и changes(scope, cursor) для точечного сброса
+необязательны: без них кэш области сбрасывается целиком. Процесс видит
+чужое изменение не позже чем через poll_interval после фиксации
+транзакции, при этом запрос не читает базу данных, пока интервал не
+истек.
+"""
+import threading
+import time
+from itertools import count
+
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils.module_loading import import_string
+
+from .constants import (
+    AUTHZ_CHANGES_KEEP,
+    AUTHZ_CHANGES_PRUNE_EVERY,
+    AUTHZ_CHANNEL_DB,
+    AUTHZ_CHANNEL_LOCMEM
+)
+from .metrics import untracked_queries
+from .models import AuthorizationChange, AuthorizationVersion
+from users.utils import get_setting
+
+
+def collect_changes(rows, cursor) -> tuple:
+    """Ключи изменений журнала после cursor.
+
+    rows - пары (id, ключ) журнала области с id не меньше cursor по
+    возрастанию id. Возвращает пару (ключи или None, новый cursor):
+    None - сбросить всю область, так как изменение было без ключей или
+    записи с id cursor уже нет в журнале (она удалена вместе со
+    следующими за ней).
+    """
+    keys = set()
+    for change_id, key in rows:
+        if change_id == cursor:
+            continue
+        if key is None:
+            keys = None
+        elif keys is not None:
+            keys.add(key)
+    if cursor and (not rows or rows[0][0] != cursor):
+        keys = None
+    return keys, rows[-1][0] if rows else cursor
+
+
+class DatabaseChannel:
+    """Версии из таблицы AuthorizationVersion.
+
+    Публиковать ничего не нужно: версия уже увеличена в транзакции
+    изменения.
+    """
+
+    def __init__(self, poll_interval=None):
+        if poll_interval is None:
+            poll_interval = get_setting('AUTHZ_POLL_INTERVAL')
+        self.poll_interval = poll_interval
+
+    def publish(self, scope: str, keys=None):
+        pass
+
+    def poll(self) -> dict:
+        with untracked_queries():
+            return dict(
+                AuthorizationVersion.objects.values_list('scope', 'version')
+            )
+
+    def record(self, scope: str, keys, using=None):
+        """Записывает ключи изменения в журнал в текущей транзакции.
+
+        keys=None - изменилась вся область. Раз в
+        AUTHZ_CHANGES_PRUNE_EVERY записей из журнала удаляются записи
+        старше последних AUTHZ_CHANGES_KEEP.
+        """
+        changes = AuthorizationChange.objects.using(using).bulk_create([
+            AuthorizationChange(scope=scope, key=key)
+            for key in ([None] if keys is None else keys)
+        ])
+        ids = [change.pk for change in changes if change.pk is not None]
+        if ids and (
+            max(ids) // AUTHZ_CHANGES_PRUNE_EVERY
+            != (min(ids) - 1) // AUTHZ_CHANGES_PRUNE_EVERY
+        ):
+            AuthorizationChange.objects.using(using).filter(
+                scope=scope, pk__lte=max(ids) - AUTHZ_CHANGES_KEEP
+            ).delete()
+
+    def changes(self, scope: str, cursor) -> tuple:
+        """Ключи изменений области после cursor и новый cursor.
+
+        При cursor=None возвращает (None, последний id журнала).
+        """
+        with untracked_queries():
+            if cursor is None:
+                return None, AuthorizationChange.objects.filter(
+                    scope=scope
+                ).aggregate(last=Max('pk'))['last'] or 0
+            return collect_changes(list(
+                AuthorizationChange.objects.filter(
+                    scope=scope, pk__gte=cursor
+                ).order_by('pk').values_list('pk', 'key')
+            ), cursor)
+
+
+class LocalMemoryChannel:
+    """Версии в памяти процесса, общие для всех экземпляров канала.
+
+    Несколько VersionWatcher с этим каналом в одном процессе ведут себя
+    как рабочие процессы с общим брокером, поэтому канал подходит для
+    тестов.
+    """
+
+    poll_interval = 0
+    _lock = threading.Lock()
+    _versions = {}
+    _changes = []
+    _ids = count(1)
+
+    def publish(self, scope: str, keys=None):
+        with self._lock:
+            self._versions[scope] = self._versions.get(scope, 0) + 1
+            self._changes.extend(
+                (next(self._ids), scope, key)
+                for key in ([None] if keys is None else keys)
+            )
+
+    def poll(self) -> dict:
+        with self._lock:
+            return dict(self._versions)
+
+    def changes(self, scope: str, cursor) -> tuple:
+        with self._lock:
+            if cursor is None:
+                return None, max(
+                    (change_id for change_id, change_scope, _
+                     in self._changes if change_scope == scope),
+                    default=0
+                )
+            return collect_changes([
+                (change_id, key)
+                for change_id, change_scope, key in self._changes
+                if change_scope == scope and change_id >= cursor
+            ], cursor)
+
+    @classmethod
+    def clear(cls):
+        """Сбрасывает опубликованные версии и журнал изменений."""
+        with cls._lock:
+            cls._versions.clear()
+            cls._changes.clear()
+
+
+def get_channel():
+    """Создает канал версий по настройке AUTHZ_CHANNEL."""
+    channel = get_setting('AUTHZ_CHANNEL')
+    if channel == AUTHZ_CHANNEL_DB:
+        return DatabaseChannel()
+    if channel == AUTHZ_CHANNEL_LOCMEM:
+        return LocalMemoryChannel()
+    return import_string(channel)()
+
+
+class Publication:
+    """Публикация изменения области после фиксации транзакции.
+
+    Одна на область и транзакцию: хранит ключи, уже записанные в журнал
+    изменений в этой транзакции (None - изменилась вся область).
+    """
+
+    def __init__(self, watcher, scope: str):
+        self.watcher = watcher
+        self.scope = scope
+        self.keys = set()
+
+    def add(self, keys):
+        """Добавляет ключи изменения и возвращает еще не записанные.
+
+        None в аргументе или в ответе - вся область.
+        """
+        if self.keys is None:
+            return set()
+        if keys is None:
+            self.keys = None
+            return None
+        keys = set(keys) - self.keys
+        self.keys |= keys
+        return keys
+
+    def __call__(self):
+        self.watcher.publish(self.scope, self.keys)
+
+
+class VersionWatcher:
+    """Версии областей прав доступа и сброс кэшей при их изменении."""
+
+    def __init__(self, channel=None):
+        self._channel = channel
+        self._handlers = {}
+        self._lock = threading.Lock()
+        self._seen = None
+        self._cursors = {}
+        self._next_poll = 0.0
+
+    @property
+    def channel(self):
+        if self._channel is None:
+            self._channel = get_channel()
+        return self._channel
+
+    def connect(self, scope: str, handler, evict=None):
+        """Подключает сброс кэша при изменении версии области.
+
+        handler() сбрасывает весь кэш области, evict(keys) - только
+        записи с изменившимися ключами.
+        """
+        self._handlers.setdefault(scope, []).append((handler, evict))
+
+    def is_keyed(self, scope: str) -> bool:
+        """Сбрасываются ли кэши области по ключам изменений."""
+        return any(evict for _, evict in self._handlers.get(scope, ()))
+
+    def bump(self, scope: str, using=None, keys=None):
+        """Увеличивает версию области в текущей транзакции.
+
+        Вызывается из обработчиков сигналов и сервисов записи. Версия
+        увеличивается один раз за транзакцию: признаком служит еще не
+        выполненная публикация области в on_commit. Если транзакция или
+        точка сохранения откатывается, вместе с ней откатывается и
+        версия, а публикация удаляется. keys - ключи изменившихся
+        записей кэша области, подключенной с evict; без них при
+        следующей сверке процессы сбросят весь кэш области.
+        """
+        connection = transaction.get_connection(using)
+        publication = None
+        if connection.in_atomic_block:
+            publication = next((
+                func for _, func, _ in connection.run_on_commit
+                if isinstance(func, Publication)
+                and func.watcher is self and func.scope == scope
+            ), None)
+        if publication is not None:
+            self._record(publication, keys, using)
+            return
+        # Без внешней транзакции версия и журнал изменений записываются
+        # вместе, чтобы процесс не увидел версию раньше журнала.
+        with transaction.atomic(using=using, savepoint=False):
+            updated = AuthorizationVersion.objects.using(using).filter(
+                scope=scope
+            ).update(version=F('version') + 1)
+            if not updated:
+                AuthorizationVersion.objects.using(using).get_or_create(
+                    scope=scope, defaults={'version': 1}
+                )
+            publication = Publication(self, scope)
+            self._record(publication, keys, using)
+            transaction.on_commit(publication, using=using)
+
+    def _record(self, publication, keys, using):
+        keys = publication.add(keys)
+        record = getattr(self.channel, 'record', None)
+        if record is not None and self.is_keyed(publication.scope) and (
+            keys is None or keys
+        ):
+            record(publication.scope, keys, using)
+
+    def publish(self, scope: str, keys=None):
+        """Публикует изменение области в канал."""
+        self.channel.publish(scope, keys)
+
+    def sync(self, force: bool = False) -> bool:
+        """Сверяет версии с каналом, если интервал опроса истек.
+
+        Для областей, версия которых изменилась с прошлой сверки,
+        вызываются обработчики; при первой сверке - для всех областей,
+        так как кэши могли быть построены раньше нее. Пока другой поток
+        сверяет версии, вызов сразу возвращается. Возвращает True, если
+        кэши были сброшены.
+        """
+        if not force and time.monotonic() < self._next_poll:
+            return False
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            versions = self.channel.poll()
+            self._next_poll = time.monotonic() + self.channel.poll_interval
+            seen, self._seen = self._seen, versions
+            changed = [
+                scope for scope in self._handlers
+                if seen is None or versions.get(scope) != seen.get(scope)
+            ]
+            for scope in changed:
+                self._reset_scope(scope, first=seen is None)
+            return bool(changed)
+        finally:
+            self._lock.release()
+
+    def _reset_scope(self, scope: str, first: bool):
+        keys = None
+        changes = getattr(self.channel, 'changes', None)
+        if changes is not None and self.is_keyed(scope):
+            # Позиция журнала читается до сброса кэша, поэтому изменения
+            # до нее учтены сбросом, а после нее - следующей сверкой.
+            keys, self._cursors[scope] = changes(
+                scope, None if first else self._cursors.get(scope)
+            )
+        for handler, evict in self._handlers[scope]:
+            if keys is not None and evict is not None:
+                evict(keys)
+            else:
+                handler()
+
+    def restore(self, versions: dict, cursors=None) -> bool:
+        """Принимает версии, при которых построены кэши, например снимка.
+
+        cursors - позиции журнала изменений областей, прочитанные до
+        версий. Первая сверка сбросит только области, изменившиеся после
+        этих версий, а для областей с позицией журнала - только
+        изменившиеся записи. Версии таблицы AuthorizationVersion
+        сравнимы только с версиями канала db, для других каналов вызов
+        ничего не меняет. Возвращает True, если версии приняты.
+        """
+        if not isinstance(self.channel, DatabaseChannel):
+            return False
+        with self._lock:
+            if self._seen is not None:
+                return False
+            self._seen = dict(versions)
+            self._cursors = dict(cursors or {})
+        return True
+
+    def reset(self, channel=None):
+        """Забывает увиденные версии и канал, например после смены настроек."""
+        with self._lock:
+            self._channel = channel
+            self._seen = None
+            self._cursors = {}
+            self._next_poll = 0.0
+
+
+version_watcher = VersionWatcher()
@@ -1,6 +1,53 @@
 """Константы для Permissions."""
 PERMISSIONS_CONSTANTS = {
-    "names": 150
+    "names": 150,
+    "action": 32
 }
 APP_NAME = 'permissions'
 PERMISSIONS_ROLES_METHODS = ['get', 'post', 'patch', 'delete']
+PERMISSIONS_CHECK_METHODS = ['POST']
+PERMISSIONS_CHECK_LIMIT = 1000
+PERMISSION_ACTIONS = {
+    'get_list': 'get_list_permission',
+    'create_obj': 'create_obj_permission',
+    'get_obj': 'get_obj_permission',
+    'update_obj': 'update_obj_permission',
+    'partial_update_obj': 'partial_update_obj_permission',
+    'delete_obj': 'delete_obj_permission',
+    'owner': 'owner_permission',
+}
+ACTION_BITS = {
+    action: 1 << index for index, action in enumerate(PERMISSION_ACTIONS)
+}
+# Действия, которые по умолчанию разрешает owner_permission.
+OWNER_ACTIONS = ('get_list', 'get_obj')
+METHOD_ACTIONS = {
+    'GET': 'get_list',
+    'POST': 'create_obj',
+    'PUT': 'update_obj',
+    'PATCH': 'partial_update_obj',
+    'DELETE': 'delete_obj',
+}
+# Области версий прав доступа (см. permissions.coherence).
+AUTHZ_SCOPE_PERMISSIONS = 'permissions'
+AUTHZ_SCOPE_USERS = 'users'
+AUTHZ_SCOPES = (AUTHZ_SCOPE_PERMISSIONS, AUTHZ_SCOPE_USERS)
+AUTHZ_CHANNEL_DB = 'db'
+# Журнал изменений областей (AuthorizationChange): сколько последних
+# записей хранить и через сколько записей удалять более старые.
+AUTHZ_CHANGES_KEEP = 10000
+AUTHZ_CHANGES_PRUNE_EVERY = 1000
+AUTHZ_CHANNEL_LOCMEM = 'locmem'
+AUTHZ_SNAPSHOT_FORMAT = 2
+AUDIT_SINK_DB = 'db'
+AUDIT_SINK_JSONL = 'jsonl'
+AUDIT_BUFFER_SIZE = 10000
+AUDIT_BATCH_SIZE = 500
+AUDIT_FLUSH_INTERVAL = 1.0
+AUDIT_FILE_MAX_BYTES = 50 * 1024 * 1024
+AUDIT_FILE_BACKUP_COUNT = 5
+METRICS_SECONDS_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0
+)
+METRICS_DB_QUERIES_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
@@ -0,0 +1,97 @@
+"""Контекст авторизации в рамках одного запроса.
+
+Один запрос может проверять права несколько раз: несколько классов
+разрешений, повторные вызовы has_permission. Контекст хранится в
+HttpRequest и запоминает роли пользователя и уже вычисленные маски прав
+по приложениям, поэтому роли загружаются не больше одного раза за запрос.
+"""
+from collections.abc import Iterable
+
+from . import engine
+from .matrix import permission_matrix
+
+
+class AuthorizationContext:
+    """Роли и права пользователя, вычисленные в текущем запросе."""
+
+    def __init__(self, user):
+        self.user = user
+        self._user_roles = None
+        self._grants = {}
+        # Права ролей пользователя, прочитанные без матрицы прав.
+        self._role_closure = {}
+        self._role_table = {}
+        # Доступ выдан только к собственным объектам пользователя
+        # (owner_permission), см. permissions.filters.OwnerFilter.
+        self.owner_scoped = False
+
+    @property
+    def user_roles(self) -> frozenset:
+        """Роли пользователя, загружаются при первом обращении."""
+        if self._user_roles is None:
+            self._user_roles = engine.get_user_roles(self.user)
+        return self._user_roles
+
+    def get_grants(self, slugs: Iterable[str], roles=None) -> dict:
+        """Возвращает маски прав по приложениям, вычисляя только новые."""
+        slugs = set(slugs)
+        grants = self._grants.setdefault(
+            None if roles is None else frozenset(roles), {}
+        )
+        missing = slugs - grants.keys()
+        if missing and not permission_matrix.is_loaded:
+            grants.update(self._get_role_grants(missing, roles))
+        elif missing:
+            grants.update(engine.get_grants(
+                self.user, missing, roles, user_roles=self.user_roles
+            ))
+        return {slug: grants[slug] for slug in slugs}
+
+    def _get_role_grants(self, slugs: set, roles=None) -> dict:
+        """Права, пока матрица не загружена.
+
+        Роли пользователя и их права по приложению читаются одним
+        запросом, после чего проверки с другим ограничением roles в том
+        же запросе обходятся без базы данных.
+        """
+        unknown = slugs - self._role_table.keys()
+        if unknown:
+            closure, table = engine.fetch_role_grants(
+                self.user, unknown, self._user_roles
+            )
+            self._role_closure.update(closure)
+            self._role_table.update(table)
+            if self._user_roles is None:
+                self._user_roles = frozenset(closure)
+        return engine.combine_grants(
+            self._role_closure, self._role_table, slugs, roles
+        )
+
+    def check_many(self, checks: Iterable[tuple], roles=None) -> list[bool]:
+        """Проверяет список пар (slug, action) для пользователя запроса."""
+        checks = list(checks)
+        if not self.user.is_authenticated:
+            return [False] * len(checks)
+        grants = self.get_grants({slug for slug, _ in checks}, roles)
+        return engine.decide(grants, checks)
+
+    def check(self, slug: str, action: str, roles=None) -> bool:
+        """Проверяет, разрешено ли пользователю действие в приложении."""
+        return self.check_many([(slug, action)], roles)[0]
+
+
+def get_authorization_context(request) -> AuthorizationContext:
+    """Возвращает контекст авторизации запроса.
+
+    Контекст создается при первом обращении и хранится в HttpRequest
+    (request._request для запросов DRF), поэтому он общий для всех
+    классов разрешений и представлений запроса. При смене пользователя
+    запроса контекст создается заново.
+    """
+    user = request.user
+    http_request = getattr(request, '_request', request)
+    context = getattr(http_request, 'authorization_context', None)
+    if context is None or context.user is not user:
+        context = AuthorizationContext(user)
+        http_request.authorization_context = context
+    return context
@@ -0,0 +1,288 @@
+"""Единый механизм авторизации.
+
+Права пользователя - это объединение прав всех его ролей, включая
+права, унаследованные по справочнику ролей. Если матрица прав уже
+загружена в память (см. permissions.matrix), проверка стоит не больше
+одного запроса за ролями пользователя. Если матрица не загружена, права
+по запрошенным приложениям получаем одним запросом: рекурсивный CTE
+обходит наследование ролей от ролей пользователя и соединяется с
+Permissions и BusinessElements. Сама матрица загружается после отправки
+ответа (см. permissions.signals).
+
+Функции с префиксом a - асинхронные варианты для ASGI-представлений,
+они используют асинхронный интерфейс ORM.
+"""
+from collections.abc import Iterable
+
+from asgiref.sync import sync_to_async
+from django.db import connections, router
+from django.db.models import Q
+
+from .constants import ACTION_BITS, PERMISSION_ACTIONS
+from .matrix import permission_matrix
+from .models import BusinessElements, Permissions
+from users.models import RoleDefinitions, Roles
+
+
+def _roles_queryset(user):
+    return Roles.objects.filter(user_id=user.pk).values_list(
+        'role', flat=True
+    )
+
+
+def get_user_roles(user) -> frozenset:
+    """Возвращает набор ролей пользователя.
+
+    Роли, уже известные из токена доступа (атрибут authz_roles),
+    используются без обращения к базе данных.
+    """
+    roles = getattr(user, 'authz_roles', None)
+    if roles is not None:
+        return roles
+    return frozenset(_roles_queryset(user))
+
+
+async def aget_user_roles(user) -> frozenset:
+    """Асинхронный вариант get_user_roles."""
+    roles = getattr(user, 'authz_roles', None)
+    if roles is not None:
+        return roles
+    return frozenset([role async for role in _roles_queryset(user)])
+
+
+def _grants_sql(connection, seed: str, slugs) -> str:
+    """SQL прав по приложениям с обходом наследования ролей.
+
+    Строка результата - (роль пользователя, ее роль-предок, slug
+    приложения и флаги действий предка). Предки без прав в запрошенных
+    приложениях возвращаются с пустым slug: по ним проверяется
+    ограничение roles. UNION отбрасывает повторы, поэтому циклы в
+    графе наследования не зацикливают запрос.
+    """
+    qn = connection.ops.quote_name
+    parents = RoleDefinitions.parents.through._meta
+    permissions = Permissions._meta
+    elements = BusinessElements._meta
+    child = qn(parents.get_field('from_roledefinitions').column)
+    parent = qn(parents.get_field('to_roledefinitions').column)
+    role = qn(permissions.get_field('role').column)
+    element = qn(permissions.get_field('business_element').column)
+    element_id = qn(elements.pk.column)
+    slug = qn(elements.get_field('slug').column)
+    flags = ', '.join(
+        f'p.{qn(permissions.get_field(field).column)}'
+        for field in PERMISSION_ACTIONS.values()
+    )
+    return (
+        f'WITH RECURSIVE closure (role, ancestor) AS ({seed} UNION '
+        f'SELECT c.role, r.{parent} FROM closure c '
+        f'JOIN {qn(parents.db_table)} r ON r.{child} = c.ancestor) '
+        f'SELECT c.role, c.ancestor, e.{slug}, {flags} '
+        f'FROM closure c LEFT JOIN ({qn(permissions.db_table)} p '
+        f'JOIN {qn(elements.db_table)} e ON e.{element_id} = p.{element} '
+        f'AND e.{slug} IN ({", ".join(["%s"] * len(slugs))})) '
+        f'ON p.{role} = c.ancestor'
+    )
+
+
+def fetch_role_grants(user, slugs, user_roles=None) -> tuple:
+    """Роли пользователя и их права по приложениям одним запросом.
+
+    Используется, пока матрица прав не загружена. Обход наследования
+    начинается с user_roles, если они известны, иначе с ролей
+    пользователя из Roles. Возвращает пару (closure, table): closure -
+    {роль пользователя: набор ее предков вместе с ней}, table -
+    {slug: {роль пользователя: итоговая маска}} для всех slugs.
+    """
+    slugs = list(slugs)
+    table = {slug: {} for slug in slugs}
+    if not slugs or user_roles is not None and not user_roles:
+        return {}, table
+    connection = connections[router.db_for_read(Permissions)]
+    qn = connection.ops.quote_name
+    if user_roles is None:
+        roles = Roles._meta
+        role = qn(roles.get_field('role').column)
+        seed = (
+            f'SELECT {role}, {role} FROM {qn(roles.db_table)} '
+            f'WHERE {qn(roles.get_field("user").column)} = %s'
+        )
+        params = [user.pk]
+    else:
+        definitions = RoleDefinitions._meta
+        name = qn(definitions.get_field('name').column)
+        seed = (
+            f'SELECT {name}, {name} FROM {qn(definitions.db_table)} '
+            f'WHERE {name} IN ({", ".join(["%s"] * len(user_roles))})'
+        )
+        params = list(user_roles)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _grants_sql(connection, seed, slugs), params + slugs
+        )
+        rows = cursor.fetchall()
+    closure = {}
+    for role, ancestor, slug, *flags in rows:
+        closure.setdefault(role, set()).add(ancestor)
+        if slug is None:
+            continue
+        mask = table[slug].get(role, 0)
+        for action, flag in zip(PERMISSION_ACTIONS, flags):
+            if flag:
+                mask |= ACTION_BITS[action]
+        table[slug][role] = mask
+    return closure, table
+
+
+def combine_grants(closure, table, slugs, roles=None) -> dict:
+    """Объединяет права ролей из результата fetch_role_grants.
+
+    roles - ограничение, как в get_grants.
+    """
+    user_roles = closure.keys()
+    if roles is not None:
+        roles = set(roles)
+        user_roles = {
+            role for role in user_roles if closure[role] & roles
+        }
+    grants = {}
+    for slug in slugs:
+        element_grants = table[slug]
+        mask = 0
+        for role in user_roles:
+            mask |= element_grants.get(role, 0)
+        grants[slug] = mask
+    return grants
+
+
+def _fetch_grants(user, slugs, roles=None, user_roles=None) -> dict:
+    """Права пользователя одним запросом без матрицы прав."""
+    closure, table = fetch_role_grants(user, slugs, user_roles)
+    return combine_grants(closure, table, slugs, roles)
+
+
+def get_grants(
+    user, slugs: Iterable[str], roles=None, user_roles=None
+) -> dict:
+    """Возвращает битовые маски разрешенных действий по приложениям.
+
+    roles - необязательное ограничение: учитываются только роли
+    пользователя, совпадающие с roles или наследующие их права.
+    user_roles - уже известный набор ролей пользователя (например, из
+    контекста запроса), с ним Roles не запрашиваются.
+    """
+    slugs = set(slugs)
+    if user_roles is None:
+        user_roles = getattr(user, 'authz_roles', None)
+    if not permission_matrix.is_loaded:
+        return _fetch_grants(user, slugs, roles, user_roles)
+    if user_roles is None:
+        user_roles = get_user_roles(user)
+    return permission_matrix.get_grants(user_roles, slugs, roles)
+
+
+async def aget_grants(user, slugs: Iterable[str], roles=None) -> dict:
+    """Асинхронный вариант get_grants.
+
+    Матрица прав здесь не загружается: пока ее нет, права читаются
+    одним запросом.
+    """
+    slugs = set(slugs)
+    if not permission_matrix.is_loaded:
+        return await sync_to_async(_fetch_grants)(
+            user, slugs, roles, getattr(user, 'authz_roles', None)
+        )
+    user_roles = await aget_user_roles(user)
+    return permission_matrix.get_grants(user_roles, slugs, roles)
+
+
+def decide(grants, checks) -> list[bool]:
+    """Решения по парам (slug, action) по уже вычисленным маскам прав."""
+    return [
+        bool(grants[slug] & ACTION_BITS[action]) for slug, action in checks
+    ]
+
+
+def check_many(user, checks: Iterable[tuple], roles=None) -> list[bool]:
+    """Проверяет список пар (slug, action) для пользователя.
+
+    Возвращает список решений в порядке переданных проверок.
+    """
+    checks = list(checks)
+    if not user.is_authenticated:
+        return [False] * len(checks)
+    grants = get_grants(user, {slug for slug, _ in checks}, roles)
+    return decide(grants, checks)
+
+
+async def acheck_many(user, checks: Iterable[tuple], roles=None):
+    """Асинхронный вариант check_many."""
+    checks = list(checks)
+    if not user.is_authenticated:
+        return [False] * len(checks)
+    grants = await aget_grants(user, {slug for slug, _ in checks}, roles)
+    return decide(grants, checks)
+
+
+def check(user, slug: str, action: str, roles=None) -> bool:
+    """Проверяет, разрешено ли пользователю действие в приложении."""
+    return check_many(user, [(slug, action)], roles)[0]
+
+
+async def acheck(user, slug: str, action: str, roles=None) -> bool:
+    """Асинхронный вариант check."""
+    return (await acheck_many(user, [(slug, action)], roles))[0]
+
+
+def _users_roles_queryset(checks):
+    ids = {user for user, _, _ in checks if isinstance(user, int)}
+    emails = {user for user, _, _ in checks if isinstance(user, str)}
+    return Roles.objects.filter(
+        Q(user_id__in=ids) | Q(user__email__in=emails),
+        user__is_active=True
+    ).order_by().values_list(
+        'user_id', 'user__email', 'user__is_superuser', 'user__is_staff',
+        'role'
+    )
+
+
+def _decide_users(table, rows, checks) -> list[bool]:
+    roles, admins = {}, set()
+    for user_id, email, is_superuser, is_staff, role in rows:
+        roles.setdefault(user_id, set()).add(role)
+        roles.setdefault(email, set()).add(role)
+        if is_superuser and is_staff:
+            admins.update((user_id, email))
+    results = []
+    for user, slug, action in checks:
+        element_grants = table.get(slug, {})
+        mask = 0
+        for role in roles.get(user, ()):
+            mask |= element_grants.get(role, 0)
+        results.append(
+            user in admins or bool(mask & ACTION_BITS[action])
+        )
+    return results
+
+
+def check_users(checks: Iterable[tuple]) -> list[bool]:
+    """Проверяет список троек (user, slug, action) для разных пользователей.
+
+    Пользователь задается id (int) или email (str). Роли всех
+    пользователей загружаются одним запросом, права берутся из матрицы.
+    Удаленные и неизвестные пользователи доступа не получают,
+    суперпользователь получает доступ ко всему.
+    """
+    checks = list(checks)
+    rows = list(_users_roles_queryset(checks))
+    return _decide_users(permission_matrix.get_table(), rows, checks)
+
+
+async def acheck_users(checks: Iterable[tuple]) -> list[bool]:
+    """Асинхронный вариант check_users."""
+    checks = list(checks)
+    rows = [row async for row in _users_roles_queryset(checks)]
+    table = permission_matrix.get_table(load=False)
+    if table is None:
+        table = await sync_to_async(permission_matrix.get_table)()
+    return _decide_users(table, rows, checks)
@@ -0,0 +1,46 @@
+"""Ограничение списков объектов правом автора (owner_permission).
+
+Модель, объекты которой принадлежат пользователям, объявляет поле
+владельца атрибутом класса OWNER_FIELD (например, OWNER_FIELD = 'user'
+у Roles). Если у пользователя нет права на действие, но есть
+owner_permission, класс разрешений пропускает запрос, а OwnerFilter
+ограничивает queryset условием WHERE <поле владельца>_id = id
+пользователя. Проверка выполняется в SQL по индексу внешнего ключа,
+без загрузки и перебора объектов в Python.
+"""
+from rest_framework.filters import BaseFilterBackend
+
+from .context import get_authorization_context
+
+
+def get_owner_field(model):
+    """Возвращает поле владельца модели или None."""
+    return getattr(model, 'OWNER_FIELD', None)
+
+
+class OwnerFilter(BaseFilterBackend):
+    """Оставляет в queryset только объекты пользователя запроса.
+
+    Фильтр применяется, только если доступ к запросу выдан по
+    owner_permission (см. EnginePermission); при полном праве на
+    действие queryset не меняется.
+    """
+
+    @staticmethod
+    def is_enabled(view) -> bool:
+        """Поддерживает ли представление доступ автора к своим объектам."""
+        queryset = getattr(view, 'queryset', None)
+        return queryset is not None and get_owner_field(
+            queryset.model
+        ) is not None and any(
+            issubclass(backend, OwnerFilter)
+            for backend in getattr(view, 'filter_backends', ())
+        )
+
+    def filter_queryset(self, request, queryset, view):
+        if not get_authorization_context(request).owner_scoped:
+            return queryset
+        owner_field = get_owner_field(queryset.model)
+        if owner_field is None:
+            return queryset.none()
+        return queryset.filter(**{owner_field: request.user.pk})
@@ -0,0 +1,43 @@
+"""Команда для сохранения снимка прав доступа."""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from permissions.snapshot import build_snapshot, write_snapshot
+from users.constants import USER_STATE_CACHE_SIZE
+from users.utils import get_setting
+
+
+class Command(BaseCommand):
+    help = (
+        'Сохраняет приложения, права ролей и состояние пользователей в '
+        'файл снимка, который процессы сервера загружают при запуске '
+        '(настройка AUTHZ_SNAPSHOT).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            help='Файл снимка, по умолчанию из настройки AUTHZ_SNAPSHOT.'
+        )
+        parser.add_argument(
+            '--max-users', type=int, default=USER_STATE_CACHE_SIZE,
+            help='Максимальное число пользователей в снимке.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['output'] or get_setting('AUTHZ_SNAPSHOT')
+        if not path:
+            raise CommandError(
+                'Укажите --output или настройку AUTHZ_SNAPSHOT.'
+            )
+        started = time.monotonic()
+        snapshot = build_snapshot(options['max_users'])
+        size = write_snapshot(snapshot, path)
+        self.stdout.write(self.style.SUCCESS(
+            f'Снимок прав сохранен в {path}: приложений '
+            f'{len(snapshot["elements"])}, прав '
+            f'{len(snapshot["permissions"])}, пользователей '
+            f'{len(snapshot["users"])}, {size / 1024:.0f} КБ за '
+            f'{time.monotonic() - started:.1f} с.'
+        ))
@@ -0,0 +1,234 @@
+"""Скомпилированная матрица прав доступа: приложение x роль x действие.
+
+Матрица строится двумя запросами: права из BusinessElements и Permissions
+и граф наследования ролей из RoleDefinitions. Для каждой роли заранее
+вычисляется транзитивное замыкание ее родителей, и в матрицу
+записывается итоговая маска роли с учетом унаследованных прав. Поэтому
+проверка права, в том числе унаследованного, сводится к поиску в
+словаре и битовой маске без обращения к базе данных.
+
+Изменения моделей подхватываются через сигналы post_save/post_delete и
+m2m_changed (см. permissions.signals), другие процессы узнают о них по
+версии прав (см. permissions.coherence). Массовые операции через
+QuerySet.update() и bulk_create() сигналы не отправляют: в их транзакции
+нужно вызвать version_watcher.bump(AUTHZ_SCOPE_PERMISSIONS), а после нее -
+permission_matrix.invalidate().
+"""
+import threading
+
+from .constants import ACTION_BITS, PERMISSION_ACTIONS
+from .metrics import MATRIX_LOOKUPS, untracked_queries
+from .models import BusinessElements
+from users.models import RoleDefinitions
+
+
+def get_permission_mask(permission) -> int:
+    """Собирает битовую маску действий из записи Permissions."""
+    mask = 0
+    for action, field in PERMISSION_ACTIONS.items():
+        if getattr(permission, field):
+            mask |= ACTION_BITS[action]
+    return mask
+
+
+def compile_role_closure(edges) -> dict:
+    """Вычисляет для каждой роли набор ролей, права которых она получает.
+
+    edges - пары (роль, родительская роль). В набор роли входят она сама
+    и все ее предки. Циклы в графе допустимы: роли цикла получают права
+    друг друга.
+    """
+    parents = {}
+    for role, parent in edges:
+        parents.setdefault(role, set()).add(parent)
+        parents.setdefault(parent, set())
+    closure = {}
+    for role in parents:
+        ancestors, stack = {role}, [role]
+        while stack:
+            for parent in parents[stack.pop()]:
+                if parent not in ancestors:
+                    ancestors.add(parent)
+                    stack.append(parent)
+        closure[role] = frozenset(ancestors)
+    return closure
+
+
+def fetch_matrix_data() -> tuple:
+    """Читает данные матрицы двумя запросами.
+
+    Права берутся запросом к BusinessElements с LEFT JOIN на Permissions.
+    Возвращает аргументы PermissionMatrix.restore().
+    """
+    fields = [
+        f'business_app__{field}' for field in PERMISSION_ACTIONS.values()
+    ]
+    elements, permissions = {}, []
+    rows = BusinessElements.objects.order_by().values_list(
+        'id', 'slug', 'business_app__id', 'business_app__role', *fields
+    )
+    for element_id, slug, permission_id, role, *flags in rows:
+        elements[element_id] = slug
+        if permission_id is None:
+            continue
+        mask = 0
+        for action, flag in zip(PERMISSION_ACTIONS, flags):
+            if flag:
+                mask |= ACTION_BITS[action]
+        permissions.append((permission_id, element_id, role, mask))
+    role_edges = list(RoleDefinitions.parents.through.objects.values_list(
+        'from_roledefinitions_id', 'to_roledefinitions_id'
+    ))
+    return elements, permissions, role_edges
+
+
+class PermissionMatrix:
+    """Матрица прав доступа, общая для всех запросов процесса."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._grants = None
+        self._direct = {}
+        self._closure = {}
+        self._slugs = {}
+        self._permission_keys = {}
+
+    @property
+    def is_loaded(self) -> bool:
+        """Загружена ли матрица в память."""
+        return self._grants is not None
+
+    def load(self):
+        """Строит матрицу по данным из базы данных."""
+        with self._lock, untracked_queries():
+            self.restore(*fetch_matrix_data())
+
+    def restore(self, elements, permissions, role_edges):
+        """Строит матрицу из готовых данных без запросов к базе данных.
+
+        elements - словарь {id приложения: slug}, permissions - четверки
+        (id записи Permissions, id приложения, роль, маска действий),
+        role_edges - пары (роль, родительская роль). Используется при
+        загрузке из базы данных и из снимка (см. permissions.snapshot).
+        """
+        direct = {slug: {} for slug in elements.values()}
+        permission_keys = {}
+        for permission_id, element_id, role, mask in permissions:
+            slug = elements[element_id]
+            direct[slug][role] = mask
+            permission_keys[permission_id] = (slug, role)
+        with self._lock:
+            self._closure = compile_role_closure(role_edges)
+            self._direct = direct
+            self._slugs = dict(elements)
+            self._permission_keys = permission_keys
+            self._grants = {
+                slug: self._compile(element_grants)
+                for slug, element_grants in direct.items()
+            }
+
+    def _compile(self, element_grants) -> dict:
+        """Итоговые маски ролей в приложении с учетом наследования."""
+        grants = {}
+        for role in self._closure.keys() | element_grants.keys():
+            mask = 0
+            for ancestor in self._closure.get(role, (role,)):
+                mask |= element_grants.get(ancestor, 0)
+            if mask:
+                grants[role] = mask
+        return grants
+
+    def get_table(self, load: bool = True):
+        """Возвращает таблицу {slug: {role: mask}} с учетом наследования.
+
+        Если матрица не загружена и load=False, возвращает None.
+        """
+        grants = self._grants
+        if grants is not None:
+            MATRIX_LOOKUPS.inc('hit')
+        elif load:
+            MATRIX_LOOKUPS.inc('miss')
+            with self._lock:
+                if self._grants is None:
+                    self.load()
+                grants = self._grants
+        return grants
+
+    def get_grants(self, user_roles, slugs, roles=None) -> dict:
+        """Объединяет маски ролей пользователя по приложениям.
+
+        roles - необязательное ограничение: учитываются только роли
+        пользователя, которые совпадают с одной из roles или наследуют
+        ее права.
+        """
+        table = self.get_table()
+        if roles is not None:
+            roles = set(roles)
+            user_roles = {
+                role for role in user_roles
+                if self._closure.get(role, {role}) & roles
+            }
+        grants = {}
+        for slug in slugs:
+            element_grants = table.get(slug, {})
+            mask = 0
+            for role in user_roles:
+                mask |= element_grants.get(role, 0)
+            grants[slug] = mask
+        return grants
+
+    def invalidate(self):
+        """Сбрасывает матрицу, она будет построена при следующем обращении."""
+        with self._lock:
+            self._grants = None
+            self._direct = {}
+            self._closure = {}
+            self._slugs = {}
+            self._permission_keys = {}
+
+    def has_element(self, slug: str) -> bool:
+        """Проверяет, зарегистрировано ли приложение с указанным slug."""
+        return slug in self.get_table()
+
+    def get_mask(self, slug: str, role: str) -> int:
+        """Возвращает итоговую маску разрешенных действий роли."""
+        return self.get_table().get(slug, {}).get(role, 0)
+
+    def allows(self, slug: str, role: str, action: str) -> bool:
+        """Проверяет, разрешено ли роли действие в приложении."""
+        return bool(self.get_mask(slug, role) & ACTION_BITS[action])
+
+    def update_permission(self, permission):
+        """Обновляет в матрице права из сохраненной записи Permissions."""
+        with self._lock:
+            if self._grants is None:
+                return
+            self._discard_permission(permission.pk)
+            if permission.business_element_id is None:
+                return
+            slug = self._slugs.get(permission.business_element_id)
+            if slug is None:
+                self.invalidate()
+                return
+            self._direct[slug][permission.role] = get_permission_mask(
+                permission
+            )
+            self._permission_keys[permission.pk] = (slug, permission.role)
+            self._grants[slug] = self._compile(self._direct[slug])
+
+    def remove_permission(self, permission):
+        """Удаляет из матрицы права удаленной записи Permissions."""
+        with self._lock:
+            if self._grants is not None:
+                self._discard_permission(permission.pk)
+
+    def _discard_permission(self, permission_id):
+        key = self._permission_keys.pop(permission_id, None)
+        if key is not None:
+            slug, role = key
+            self._direct.get(slug, {}).pop(role, None)
+            if slug in self._direct:
+                self._grants[slug] = self._compile(self._direct[slug])
+
+
+permission_matrix = PermissionMatrix()
@@ -0,0 +1,269 @@
+"""Метрики авторизации и запросов в формате Prometheus.
+
+Метрики хранятся в памяти процесса: счетчик или гистограмма - это
+словарь по значениям меток, обновление стоит одного захвата блокировки,
+поэтому сбор можно не отключать в production. Текст для Prometheus
+формируется только при обращении к эндпоинту /api/v1/metrics/. При
+нескольких рабочих процессах каждый отдает свои значения.
+"""
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from .constants import METRICS_DB_QUERIES_BUCKETS, METRICS_SECONDS_BUCKETS
+
+
+def _format_labels(labelnames, labels, extra=()) -> str:
+    pairs = [*zip(labelnames, labels), *extra]
+    if not pairs:
+        return ''
+    values = ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n')
+        )
+        for name, value in pairs
+    )
+    return f'{{{values}}}'
+
+
+class Metric:
+    """Общая часть метрик: имя, описание и значения по меткам."""
+
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def header(self) -> list[str]:
+        return [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    """Монотонно растущий счетчик."""
+
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [
+            f'{self.name}{_format_labels(self.labelnames, labels)} {value}'
+            for labels, value in values
+        ]
+
+
+class Histogram(Metric):
+    """Гистограмма с фиксированными границами корзин."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [
+                    [0] * (len(self.buckets) + 1), 0
+                ]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = sorted(
+                (labels, list(counts), total)
+                for labels, (counts, total) in self._values.items()
+            )
+        lines = self.header()
+        for labels, counts, total in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                lines.append('{}_bucket{} {}'.format(
+                    self.name,
+                    _format_labels(self.labelnames, labels, [('le', bound)]),
+                    cumulative
+                ))
+            suffix = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{suffix} {total}')
+            lines.append(f'{self.name}_count{suffix} {cumulative}')
+        return lines
+
+
+class CallbackMetric(Metric):
+    """Значения, которые считываются из функции в момент выгрузки.
+
+    callback возвращает словарь {кортеж значений меток: значение}.
+    """
+
+    def __init__(self, name, documentation, kind, callback, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self._callback = callback
+
+    def render(self) -> list[str]:
+        return self.header() + [
+            f'{self.name}{_format_labels(self.labelnames, labels)} {value}'
+            for labels, value in sorted(self._callback().items())
+        ]
+
+
+class MetricsRegistry:
+    """Набор метрик процесса."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f'Метрика {metric.name} уже зарегистрирована.')
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self, name, documentation, labelnames=(),
+        buckets=METRICS_SECONDS_BUCKETS
+    ) -> Histogram:
+        return self.register(
+            Histogram(name, documentation, labelnames, buckets)
+        )
+
+    def callback(
+        self, name, documentation, kind, callback, labelnames=()
+    ) -> CallbackMetric:
+        return self.register(
+            CallbackMetric(name, documentation, kind, callback, labelnames)
+        )
+
+    def render(self) -> str:
+        """Текст всех метрик в формате Prometheus exposition 0.0.4."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        """Обнуляет накопленные значения (например, в тестах)."""
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+registry = MetricsRegistry()
+
+_untracked_queries = ContextVar('untracked_queries', default=False)
+
+
+@contextmanager
+def untracked_queries():
+    """SQL-запросы внутри блока не учитываются в запросах представления.
+
+    Нужен для служебных загрузок, которые не зависят от представления,
+    например построения матрицы прав после ее сброса.
+    """
+    token = _untracked_queries.set(True)
+    try:
+        yield
+    finally:
+        _untracked_queries.reset(token)
+
+
+def queries_tracked() -> bool:
+    """Учитываются ли SQL-запросы в текущем контексте."""
+    return not _untracked_queries.get()
+
+
+PERMISSION_CHECK_SECONDS = registry.histogram(
+    'authz_permission_check_seconds',
+    'Время проверки прав по приложениям.',
+    ('slug',)
+)
+PERMISSION_DECISIONS = registry.counter(
+    'authz_decisions_total',
+    'Решения о доступе по приложениям.',
+    ('slug', 'allowed')
+)
+MATRIX_LOOKUPS = registry.counter(
+    'authz_matrix_lookups_total',
+    'Обращения к матрице прав: hit - из памяти, miss - с загрузкой из БД.',
+    ('result',)
+)
+HTTP_REQUEST_SECONDS = registry.histogram(
+    'http_request_duration_seconds',
+    'Время обработки запроса по представлениям.',
+    ('view', 'method')
+)
+HTTP_DB_QUERIES = registry.histogram(
+    'http_db_queries',
+    'Число SQL-запросов на запрос по представлениям.',
+    ('view',),
+    buckets=METRICS_DB_QUERIES_BUCKETS
+)
+QUERY_BUDGET_VIOLATIONS = registry.counter(
+    'http_query_budget_violations_total',
+    'Превышения бюджета SQL-запросов (budget) и повторы запросов '
+    '(repeated) по представлениям.',
+    ('view', 'kind')
+)
+PASSWORD_HASH_SECONDS = registry.histogram(
+    'auth_password_hash_seconds',
+    'Время хеширования и проверки паролей.',
+    ('operation',)
+)
+
+
+def _audit_stats():
+    # Импорт при выгрузке: журнал аудита читает настройки через users,
+    # а users сам пишет метрики проверки паролей.
+    from .audit import audit_log
+
+    stats = audit_log.stats()
+    return {
+        (state,): stats[state]
+        for state in ('recorded', 'written', 'dropped', 'failed')
+    }
+
+
+def _audit_buffered():
+    from .audit import audit_log
+
+    return {(): audit_log.stats()['buffered']}
+
+
+registry.callback(
+    'authz_audit_records_total',
+    'Записи журнала аудита: recorded, written, dropped, failed.',
+    'counter', _audit_stats, ('state',)
+)
+registry.callback(
+    'authz_audit_buffered',
+    'Записи журнала аудита, ожидающие выгрузки.',
+    'gauge', _audit_buffered
+)
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.1 on 2026-10-18 10:44
+
+import users.validators
+from django.db import migrations, models
+
+
+def add_permission_roles(apps, schema_editor):
+    """Добавляет в справочник роли, которые есть только в Permissions."""
+    RoleDefinitions = apps.get_model('users', 'RoleDefinitions')
+    Permissions = apps.get_model('permissions', 'Permissions')
+    RoleDefinitions.objects.bulk_create(
+        [
+            RoleDefinitions(name=name)
+            for name in Permissions.objects.values_list(
+                'role', flat=True
+            ).distinct()
+        ],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('permissions', '0001_initial'),
+        ('users', '0005_role_definitions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='permissions',
+            name='role',
+            field=models.CharField(max_length=50, validators=[users.validators.validate_role_name], verbose_name='Роль'),
+        ),
+        migrations.RunPython(add_permission_roles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.1 on 2026-10-18 10:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('permissions', '0002_role_definitions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorizationAudit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(db_index=True, verbose_name='Время проверки')),
+                ('user_id', models.BigIntegerField(null=True, verbose_name='id пользователя')),
+                ('slug', models.CharField(blank=True, max_length=150, null=True, verbose_name='Приложение')),
+                ('action', models.CharField(blank=True, max_length=32, null=True, verbose_name='Действие')),
+                ('allowed', models.BooleanField(verbose_name='Доступ разрешен')),
+                ('latency_us', models.PositiveIntegerField(default=0, verbose_name='Время проверки, мкс')),
+            ],
+            options={
+                'verbose_name': 'Решение о доступе',
+                'verbose_name_plural': 'Журнал проверок доступа',
+                'ordering': ('-created_at',),
+            },
+        ),
+    ]
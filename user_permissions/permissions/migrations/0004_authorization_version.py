@@ -0,0 +1,38 @@
+# Generated by Django 5.1.1 on 2026-10-18 11:02
+
+from django.db import migrations, models
+
+from permissions.constants import AUTHZ_SCOPES
+
+
+def add_versions(apps, schema_editor):
+    """Создает строки версий для всех областей."""
+    AuthorizationVersion = apps.get_model(
+        'permissions', 'AuthorizationVersion'
+    )
+    AuthorizationVersion.objects.bulk_create(
+        [AuthorizationVersion(scope=scope) for scope in AUTHZ_SCOPES],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('permissions', '0003_authorization_audit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorizationVersion',
+            fields=[
+                ('scope', models.CharField(max_length=32, primary_key=True, serialize=False, verbose_name='Область')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='Версия')),
+            ],
+            options={
+                'verbose_name': 'Версия прав доступа',
+                'verbose_name_plural': 'Версии прав доступа',
+            },
+        ),
+        migrations.RunPython(add_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.1 on 2026-10-18 11:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('permissions', '0004_authorization_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorizationChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=32, verbose_name='Область')),
+                ('key', models.BigIntegerField(null=True, verbose_name='Ключ')),
+            ],
+            options={
+                'verbose_name': 'Изменение прав доступа',
+                'verbose_name_plural': 'Журнал изменений прав доступа',
+                'ordering': ('id',),
+                'indexes': [models.Index(fields=['scope', 'id'], name='authz_change_scope_id_idx')],
+            },
+        ),
+    ]
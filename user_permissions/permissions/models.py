@@ -3,8 +3,8 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 
 from .constants import PERMISSIONS_CONSTANTS
-from users.constants import ROLES
-from users.utils import get_role_length
+from users.constants import ROLE_MAX_LENGTH
+from users.validators import validate_role_name
 
 
 
@@ -41,8 +41,8 @@ class Permissions(models.Model):
     )
     role = models.CharField(
         verbose_name='Роль',
-        max_length=get_role_length(ROLES),
-        choices=ROLES
+        max_length=ROLE_MAX_LENGTH,
+        validators=[validate_role_name]
     )
     get_list_permission = models.BooleanField(
         _('Получение списка объектов'), default=False,
@@ -80,3 +80,93 @@ class Permissions(models.Model):
                 'уже заданы.'
             )
         ]
+
+
+class AuthorizationAudit(models.Model):
+    """Журнал решений проверки прав доступа.
+
+    Записи добавляются пачками в фоновом потоке (см. permissions.audit).
+    Пользователь хранится как id без внешнего ключа, чтобы журнал не
+    зависел от удаления пользователей и не требовал проверки ссылок при
+    вставке.
+    """
+
+    created_at = models.DateTimeField(_('Время проверки'), db_index=True)
+    user_id = models.BigIntegerField(_('id пользователя'), null=True)
+    slug = models.CharField(
+        _('Приложение'), max_length=PERMISSIONS_CONSTANTS['names'],
+        blank=True, null=True
+    )
+    action = models.CharField(
+        _('Действие'), max_length=PERMISSIONS_CONSTANTS['action'],
+        blank=True, null=True
+    )
+    allowed = models.BooleanField(_('Доступ разрешен'))
+    latency_us = models.PositiveIntegerField(
+        _('Время проверки, мкс'), default=0
+    )
+
+    class Meta:
+        """Meta класс модели AuthorizationAudit."""
+
+        ordering = ('-created_at',)
+        verbose_name = 'Решение о доступе'
+        verbose_name_plural = 'Журнал проверок доступа'
+
+    def __str__(self):
+        return f'{self.user_id} {self.slug} {self.action} {self.allowed}'
+
+
+class AuthorizationVersion(models.Model):
+    """Версия данных прав доступа для согласования кэшей процессов.
+
+    Версия области увеличивается в той же транзакции, что и изменение
+    данных (см. permissions.coherence), поэтому она никогда не видна
+    раньше изменения.
+    """
+
+    scope = models.CharField(
+        _('Область'), max_length=PERMISSIONS_CONSTANTS['action'],
+        primary_key=True
+    )
+    version = models.PositiveBigIntegerField(_('Версия'), default=0)
+
+    class Meta:
+        """Meta класс модели AuthorizationVersion."""
+
+        verbose_name = 'Версия прав доступа'
+        verbose_name_plural = 'Версии прав доступа'
+
+    def __str__(self):
+        return f'{self.scope} {self.version}'
+
+
+class AuthorizationChange(models.Model):
+    """Журнал изменений области для точечного сброса кэшей процессов.
+
+    Записи добавляются в той же транзакции, что и увеличение версии
+    области, уже после блокировки ее строки AuthorizationVersion, поэтому
+    порядок id совпадает с порядком фиксации транзакций. key - ключ
+    изменившейся записи кэша (например, id пользователя), пустой key
+    означает, что изменилась вся область.
+    """
+
+    scope = models.CharField(
+        _('Область'), max_length=PERMISSIONS_CONSTANTS['action']
+    )
+    key = models.BigIntegerField(_('Ключ'), null=True)
+
+    class Meta:
+        """Meta класс модели AuthorizationChange."""
+
+        ordering = ('id',)
+        indexes = [
+            models.Index(
+                fields=['scope', 'id'], name='authz_change_scope_id_idx'
+            ),
+        ]
+        verbose_name = 'Изменение прав доступа'
+        verbose_name_plural = 'Журнал изменений прав доступа'
+
+    def __str__(self):
+        return f'{self.scope} {self.key}'
@@ -1,44 +1,23 @@
-from django.shortcuts import get_object_or_404
+from .registry import permission_registry
+from users.permissions import EnginePermission
 
-from permissions.models import BusinessElements, Permissions
-from permissions.constants import (
-    APP_NAME,
-    PERMISSIONS_ROLES_METHODS
-)
-from users.constants import ROLE_ADMIN
-from users.models import Roles
-from users.permissions import BasicPermission
 
+class RegistryPermission(EnginePermission):
+    """Проверка прав по правилу представления из реестра.
 
-class IsAuthenticatedAndAdminPermissions(BasicPermission):
-    """Проверка is_authenticated и доступа по роли Админ."""
+    Приложение, допустимые методы, действия по методам и ограничение по
+    ролям берутся из правила, объявленного декоратором permission_rule
+    (см. permissions.registry). Запрос к представлению без правила
+    запрещается.
+    """
 
     def has_permission(self, request, view):
-        """Проверка для роли Admin на действия с объектами."""
-        if request.user.is_authenticated:
-            user_roles = Roles.objects.filter(user=request.user)
-            application = get_object_or_404(BusinessElements, slug=APP_NAME)
-            if request.method in [_.upper() for _ in PERMISSIONS_ROLES_METHODS]:
-                for role in user_roles:
-                    if role.role == ROLE_ADMIN:
-                        permission = Permissions.objects.get(
-                            business_element=application.id,
-                            role=role.role
-                        )
-                        return (
-                            (permission.get_list_permission is True
-                             and request.method == 'GET'
-                             )
-                            or (
-                                permission.create_obj_permission is True
-                                and request.method == 'POST'
-                            )
-                            or (
-                                permission.partial_update_obj_permission is True
-                                and request.method == 'PATCH'
-                            )
-                            or (permission.delete_obj_permission is True
-                                and request.method == 'DELETE'
-                                )
-                        )
-                    return super().has_permission(request, view)
+        """Проверка is_authenticated и прав по правилу представления."""
+        rule = permission_registry.get_rule(request)
+        if rule is None:
+            return False
+        self.app_name = rule.slug
+        self.methods = rule.method_actions
+        self.method_actions = rule.method_actions
+        self.roles = rule.roles
+        return super().has_permission(request, view)
@@ -0,0 +1,115 @@
+"""Реестр правил доступа представлений.
+
+Представление объявляет, к какому приложению (slug BusinessElements) оно
+относится и какое действие проверяется для каждого метода запроса:
+
+    @permission_rule('mock', methods=['GET', 'POST'])
+    @api_view(['GET', 'POST'])
+    def mock_view(request):
+        ...
+
+Декоратор ставится над @api_view или над классом представления. При
+запуске (PermissionsConfig.ready) URL-конфигурация обходится один раз и
+компилируется в таблицу {представление маршрута: правило}, поэтому
+RegistryPermission находит правило запроса одним поиском в словаре по
+request.resolver_match. Соответствие slug правил приложениям в базе
+данных проверяется системной проверкой (см. permissions.checks).
+"""
+from typing import NamedTuple
+
+from django.urls import URLPattern, URLResolver, get_resolver
+
+from .constants import METHOD_ACTIONS
+
+
+class PermissionRule(NamedTuple):
+    """Правило доступа представления."""
+
+    slug: str
+    method_actions: dict
+    roles: tuple = None
+
+
+def permission_rule(slug: str, methods=None, actions=None, roles=None):
+    """Объявляет правило доступа представления.
+
+    methods - допустимые методы запроса (по умолчанию все из
+    METHOD_ACTIONS), для каждого проверяется действие из METHOD_ACTIONS;
+    actions - словарь {метод: действие}, который переопределяет действия
+    отдельных методов; roles - роли, которыми ограничена проверка.
+    """
+    method_actions = {
+        method.upper(): METHOD_ACTIONS[method.upper()]
+        for method in methods or METHOD_ACTIONS
+    }
+    method_actions.update(
+        (method.upper(), action) for method, action in (actions or {}).items()
+    )
+    rule = PermissionRule(
+        slug, method_actions, tuple(roles) if roles is not None else None
+    )
+
+    def decorator(view):
+        view.permission_rule = rule
+        return view
+    return decorator
+
+
+def get_view_rule(view):
+    """Правило функции маршрута или ее класса (для представлений DRF)."""
+    rule = getattr(view, 'permission_rule', None)
+    view_class = getattr(view, 'cls', None)
+    if rule is None and view_class is not None:
+        rule = getattr(view_class, 'permission_rule', None)
+    return rule
+
+
+def iter_url_patterns(patterns, prefix=''):
+    """Обходит URL-конфигурацию, возвращает пары (маршрут, URLPattern)."""
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            yield from iter_url_patterns(pattern.url_patterns, route)
+        elif isinstance(pattern, URLPattern):
+            yield route, pattern
+
+
+class PermissionRegistry:
+    """Таблица правил доступа по представлениям маршрутов."""
+
+    def __init__(self):
+        self._rules = {}
+        self.routes = []
+
+    def compile(self, urlconf=None):
+        """Строит таблицу правил по URL-конфигурации."""
+        rules, routes = {}, []
+        for route, pattern in iter_url_patterns(
+            get_resolver(urlconf).url_patterns
+        ):
+            rule = get_view_rule(pattern.callback)
+            routes.append((route, pattern.callback, rule))
+            if rule is not None:
+                rules[pattern.callback] = rule
+        self._rules = rules
+        self.routes = routes
+
+    def get_rule(self, request):
+        """Правило представления, которое обрабатывает запрос, или None."""
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return None
+        rule = self._rules.get(match.func)
+        if rule is None:
+            # Маршрут, не попавший в таблицу (например, из другой
+            # URL-конфигурации), проверяется по атрибутам представления.
+            rule = get_view_rule(match.func)
+        return rule
+
+    @property
+    def slugs(self) -> set:
+        """Приложения, на которые ссылаются правила."""
+        return {rule.slug for rule in self._rules.values()}
+
+
+permission_registry = PermissionRegistry()
@@ -0,0 +1,75 @@
+"""Синхронизация матрицы прав с изменениями моделей.
+
+Изменения применяются к матрице своего процесса после фиксации
+транзакции, а версия прав увеличивается в самой транзакции, чтобы
+остальные процессы сбросили матрицу (см. permissions.coherence).
+"""
+from functools import partial
+
+from django.core.signals import request_finished, request_started
+from django.db import connections, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .coherence import version_watcher
+from .constants import AUTHZ_SCOPE_PERMISSIONS
+from .matrix import permission_matrix
+from .models import BusinessElements, Permissions
+from users.models import RoleDefinitions
+
+
+version_watcher.connect(AUTHZ_SCOPE_PERMISSIONS, permission_matrix.invalidate)
+
+
+@receiver(post_save, sender=Permissions)
+def update_permission_matrix(sender, instance, using, **kwargs):
+    """Обновляет права роли в матрице после фиксации транзакции."""
+    version_watcher.bump(AUTHZ_SCOPE_PERMISSIONS, using)
+    transaction.on_commit(
+        partial(permission_matrix.update_permission, instance), using
+    )
+
+
+@receiver(post_delete, sender=Permissions)
+def remove_permission_from_matrix(sender, instance, using, **kwargs):
+    """Удаляет права роли из матрицы после фиксации транзакции."""
+    version_watcher.bump(AUTHZ_SCOPE_PERMISSIONS, using)
+    transaction.on_commit(
+        partial(permission_matrix.remove_permission, instance), using
+    )
+
+
+@receiver(post_save, sender=BusinessElements)
+@receiver(post_delete, sender=BusinessElements)
+@receiver(post_save, sender=RoleDefinitions)
+@receiver(post_delete, sender=RoleDefinitions)
+@receiver(m2m_changed, sender=RoleDefinitions.parents.through)
+def reset_permission_matrix(sender, using, **kwargs):
+    """Сбрасывает матрицу при изменении приложений или наследования ролей."""
+    version_watcher.bump(AUTHZ_SCOPE_PERMISSIONS, using)
+    transaction.on_commit(permission_matrix.invalidate, using)
+
+
+@receiver(request_started)
+def sync_authorization_versions(sender, **kwargs):
+    """Сбрасывает кэши прав, измененных другими процессами."""
+    version_watcher.sync()
+
+
+@receiver(request_finished)
+def load_permission_matrix(sender, **kwargs):
+    """Загружает матрицу после ответа, чтобы не тратить запрос клиента.
+
+    Обработчик выполняется после close_old_connections из Django, а под
+    ASGI - в потоке пула, поэтому подключения, открытые для загрузки,
+    закрываются здесь же по тем же правилам CONN_MAX_AGE.
+    """
+    if permission_matrix.is_loaded:
+        return
+    closed = [
+        connection for connection in connections.all()
+        if connection.connection is None
+    ]
+    permission_matrix.load()
+    for connection in closed:
+        connection.close_if_unusable_or_obsolete()
@@ -0,0 +1,172 @@
+"""Снимок прав доступа для быстрого запуска рабочих процессов.
+
+Команда export_permissions_snapshot сохраняет в файл JSON приложения,
+права ролей, наследование ролей, состояние пользователей, роли активных
+пользователей и версии прав (см. permissions.coherence), при которых
+они прочитаны, а также позиции журнала изменений. Позиции читаются
+раньше версий, а версии раньше данных, поэтому данные снимка не старше
+версий.
+
+Точки входа сервера (user_permissions.wsgi и user_permissions.asgi)
+загружают снимок из файла AUTHZ_SNAPSHOT без запросов к базе данных, так
+что матрица прав и кэш состояния пользователей готовы к первому запросу.
+Команды управления и другие процессы без этих модулей снимок не
+загружают. Первая сверка версий сбрасывает
+только области, изменившиеся после снимка, и их данные загружаются из
+базы данных обычным порядком.
+"""
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime, timezone
+from time import perf_counter
+
+from django.db import connections, router
+from django.db.models import F
+
+from .coherence import DatabaseChannel, version_watcher
+from .constants import (
+    AUTHZ_SCOPES,
+    AUTHZ_SNAPSHOT_FORMAT,
+    PERMISSION_ACTIONS
+)
+from .matrix import fetch_matrix_data, permission_matrix
+from .models import AuthorizationVersion
+from users.cache import UserState, user_state_cache
+from users.models import Roles, User
+from users.utils import get_setting
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_database_name() -> str:
+    """Имя базы данных, из которой читаются права."""
+    return connections[
+        router.db_for_read(AuthorizationVersion)
+    ].settings_dict['NAME']
+
+
+def build_snapshot(max_users: int) -> dict:
+    """Читает права и состояние пользователей для снимка.
+
+    В снимок попадают не больше max_users пользователей: сначала
+    активные, из них недавно входившие - первыми.
+    """
+    channel = DatabaseChannel()
+    changes = {
+        scope: channel.changes(scope, None)[1]
+        for scope in AUTHZ_SCOPES if version_watcher.is_keyed(scope)
+    }
+    versions = dict(
+        AuthorizationVersion.objects.values_list('scope', 'version')
+    )
+    elements, permissions, role_edges = fetch_matrix_data()
+    users = {
+        user_id: [
+            user_id, is_active, is_superuser and is_staff, authz_version, []
+        ]
+        for user_id, is_active, is_superuser, is_staff, authz_version
+        in User.objects.order_by(
+            '-is_active', F('last_login').desc(nulls_last=True), 'pk'
+        ).values_list(
+            'pk', 'is_active', 'is_superuser', 'is_staff', 'authz_version'
+        )[:max_users]
+    }
+    for user_id, role in Roles.objects.filter(
+        user__is_active=True
+    ).order_by('role').values_list('user_id', 'role').iterator():
+        if user_id in users:
+            users[user_id][4].append(role)
+    return {
+        'format': AUTHZ_SNAPSHOT_FORMAT,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'database': str(get_database_name()),
+        'actions': list(PERMISSION_ACTIONS),
+        'versions': versions,
+        'changes': changes,
+        'elements': sorted(elements.items()),
+        'permissions': permissions,
+        'role_edges': role_edges,
+        'users': list(users.values()),
+    }
+
+
+def write_snapshot(snapshot: dict, path) -> int:
+    """Атомарно записывает снимок в файл и возвращает его размер.
+
+    Снимок пишется во временный файл в том же каталоге и заменяет
+    прежний, поэтому запускающийся процесс не прочитает его наполовину.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+            json.dump(
+                snapshot, file, ensure_ascii=False, separators=(',', ':')
+            )
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return os.path.getsize(path)
+
+
+def read_snapshot(path) -> dict:
+    """Читает снимок и проверяет, что он совместим с этой версией кода."""
+    with open(path, encoding='utf-8') as file:
+        snapshot = json.load(file)
+    if snapshot.get('format') != AUTHZ_SNAPSHOT_FORMAT:
+        raise ValueError(
+            f'формат {snapshot.get("format")}, ожидается '
+            f'{AUTHZ_SNAPSHOT_FORMAT}'
+        )
+    if snapshot.get('actions') != list(PERMISSION_ACTIONS):
+        raise ValueError('список действий не совпадает с PERMISSION_ACTIONS')
+    if snapshot.get('database') != str(get_database_name()):
+        raise ValueError(f'снимок другой базы данных {snapshot["database"]}')
+    return snapshot
+
+
+def load_snapshot(path=None) -> bool:
+    """Загружает снимок в матрицу прав и кэш состояния пользователей.
+
+    Если снимок не задан, не найден или не подходит, процесс запускается
+    как обычно, без снимка. Возвращает True, если снимок загружен.
+    """
+    path = path or get_setting('AUTHZ_SNAPSHOT')
+    if not path:
+        return False
+    start = perf_counter()
+    try:
+        snapshot = read_snapshot(path)
+    except (OSError, ValueError, KeyError) as error:
+        logger.warning('Снимок прав %s не загружен: %s', path, error)
+        return False
+    permission_matrix.restore(
+        dict(snapshot['elements']),
+        snapshot['permissions'],
+        snapshot['role_edges'],
+    )
+    cached = user_state_cache.set_many({
+        user_id: UserState(
+            is_active, is_admin, authz_version, frozenset(roles)
+        )
+        for user_id, is_active, is_admin, authz_version, roles
+        in snapshot['users']
+    })
+    if not version_watcher.restore(
+        snapshot['versions'], snapshot.get('changes')
+    ):
+        logger.warning(
+            'Версии снимка прав %s не приняты каналом версий, кэши будут '
+            'сброшены при первой сверке.', path
+        )
+    logger.info(
+        'Снимок прав %s от %s загружен за %.1f мс: приложений %d, '
+        'пользователей %d.', path, snapshot['created_at'],
+        (perf_counter() - start) * 1000, len(snapshot['elements']), cached
+    )
+    return True
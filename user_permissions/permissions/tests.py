@@ -0,0 +1,277 @@
+"""Тесты единого механизма авторизации и согласования кэшей прав."""
+from django.db import transaction
+from django.test import TestCase
+
+from . import engine
+from .coherence import DatabaseChannel, LocalMemoryChannel, VersionWatcher
+from .constants import ACTION_BITS, AUTHZ_SCOPE_USERS, PERMISSION_ACTIONS
+from .matrix import compile_role_closure, permission_matrix
+from .models import (
+    AuthorizationChange,
+    AuthorizationVersion,
+    BusinessElements,
+    Permissions
+)
+from users.constants import ROLE_ADMIN, ROLE_GUEST, ROLE_MANAGER, ROLE_USER
+from users.models import RoleDefinitions, Roles, User
+
+
+REPORTS = 'reports'
+BILLING = 'billing'
+SLUGS = (REPORTS, BILLING)
+RESTRICTIONS = (None, (ROLE_GUEST,), (ROLE_USER,), (ROLE_ADMIN,))
+
+
+def mask(*actions) -> int:
+    """Битовая маска перечисленных действий."""
+    result = 0
+    for action in actions:
+        result |= ACTION_BITS[action]
+    return result
+
+
+class AuthorizationDataMixin:
+    """Приложения, права и наследование ролей для тестов.
+
+    Наследование: manager -> user -> guest. Права: guest - список
+    reports, user - объект billing, manager - создание в reports,
+    admin (без родителей) - удаление в billing.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        reports = BusinessElements.objects.create(name='Отчеты', slug=REPORTS)
+        billing = BusinessElements.objects.create(name='Счета', slug=BILLING)
+        Permissions.objects.bulk_create([
+            Permissions(
+                business_element=reports, role=ROLE_GUEST,
+                get_list_permission=True
+            ),
+            Permissions(
+                business_element=billing, role=ROLE_USER,
+                get_obj_permission=True
+            ),
+            Permissions(
+                business_element=reports, role=ROLE_MANAGER,
+                create_obj_permission=True
+            ),
+            Permissions(
+                business_element=billing, role=ROLE_ADMIN,
+                delete_obj_permission=True
+            ),
+        ])
+        definitions = RoleDefinitions.objects.in_bulk()
+        definitions[ROLE_USER].parents.set([ROLE_GUEST])
+        definitions[ROLE_MANAGER].parents.set([ROLE_USER])
+        cls.manager = cls.create_user('manager@mail.ru', ROLE_MANAGER)
+        cls.user_admin = cls.create_user(
+            'user-admin@mail.ru', ROLE_USER, ROLE_ADMIN
+        )
+        cls.guest = cls.create_user('guest@mail.ru', ROLE_GUEST)
+        cls.users = (cls.manager, cls.user_admin, cls.guest)
+
+    @staticmethod
+    def create_user(email, *roles):
+        """Пользователь ровно с перечисленными ролями."""
+        user = User.objects.create_user(email, 'test2025')
+        Roles.objects.filter(user=user).delete()
+        Roles.objects.bulk_create(
+            [Roles(user=user, role=role) for role in roles]
+        )
+        return user
+
+    def setUp(self):
+        # Изменения в setUpTestData не фиксируются, поэтому обработчики
+        # on_commit не сбрасывают матрицу, общую для всего процесса.
+        permission_matrix.invalidate()
+        self.addCleanup(permission_matrix.invalidate)
+
+
+class ColdEngineTests(AuthorizationDataMixin, TestCase):
+    """Права без загруженной матрицы: один запрос с обходом наследования."""
+
+    def get_grants(self, user, roles=None):
+        grants = engine.get_grants(user, SLUGS, roles)
+        self.assertFalse(permission_matrix.is_loaded)
+        return grants
+
+    def test_multi_role_union(self):
+        self.assertEqual(self.get_grants(self.user_admin), {
+            REPORTS: mask('get_list'),
+            BILLING: mask('get_obj', 'delete_obj'),
+        })
+
+    def test_inherited_grant(self):
+        self.assertEqual(self.get_grants(self.manager), {
+            REPORTS: mask('get_list', 'create_obj'),
+            BILLING: mask('get_obj'),
+        })
+        self.assertTrue(engine.check(self.manager, REPORTS, 'get_list'))
+        self.assertFalse(engine.check(self.manager, BILLING, 'delete_obj'))
+
+    def test_roles_restriction(self):
+        self.assertEqual(
+            self.get_grants(self.user_admin, roles=(ROLE_GUEST,)),
+            {REPORTS: mask('get_list'), BILLING: mask('get_obj')}
+        )
+        self.assertEqual(
+            self.get_grants(self.user_admin, roles=(ROLE_ADMIN,)),
+            {REPORTS: 0, BILLING: mask('delete_obj')}
+        )
+        self.assertEqual(
+            self.get_grants(self.guest, roles=(ROLE_MANAGER,)),
+            {REPORTS: 0, BILLING: 0}
+        )
+
+    def test_one_query(self):
+        with self.assertNumQueries(1):
+            engine.get_grants(self.manager, SLUGS)
+
+
+class WarmEngineTests(ColdEngineTests):
+    """Те же проверки по загруженной матрице прав."""
+
+    def setUp(self):
+        super().setUp()
+        permission_matrix.load()
+
+    def get_grants(self, user, roles=None):
+        grants = engine.get_grants(user, SLUGS, roles)
+        self.assertTrue(permission_matrix.is_loaded)
+        return grants
+
+    def test_one_query(self):
+        with self.assertNumQueries(1):
+            engine.get_grants(self.manager, SLUGS)
+        with self.assertNumQueries(0):
+            engine.get_grants(self.manager, SLUGS, user_roles={ROLE_USER})
+
+
+class MatrixEquivalenceTests(AuthorizationDataMixin, TestCase):
+    """Матрица, запрос без матрицы и check_users дают одни решения."""
+
+    def setUp(self):
+        super().setUp()
+        # Цикл в графе наследования: admin и guest получают права друг
+        # друга.
+        definitions = RoleDefinitions.objects.in_bulk()
+        definitions[ROLE_GUEST].parents.add(ROLE_ADMIN)
+        definitions[ROLE_ADMIN].parents.add(ROLE_GUEST)
+
+    def test_cold_and_warm_grants_match(self):
+        cold = {
+            (user.pk, roles): engine.get_grants(user, SLUGS, roles)
+            for user in self.users for roles in RESTRICTIONS
+        }
+        permission_matrix.load()
+        for user in self.users:
+            for roles in RESTRICTIONS:
+                with self.subTest(user=user.email, roles=roles):
+                    self.assertEqual(
+                        engine.get_grants(user, SLUGS, roles),
+                        cold[user.pk, roles]
+                    )
+
+    def test_check_users_matches_check(self):
+        checks = [
+            (user, slug, action)
+            for user in self.users for slug in SLUGS
+            for action in PERMISSION_ACTIONS
+        ]
+        expected = [
+            engine.check(user, slug, action) for user, slug, action in checks
+        ]
+        self.assertEqual(engine.check_users(
+            (user.pk, slug, action) for user, slug, action in checks
+        ), expected)
+        self.assertEqual(engine.check_users(
+            (user.email, slug, action) for user, slug, action in checks
+        ), expected)
+
+    def test_cycle_grants(self):
+        self.assertEqual(engine.get_grants(self.guest, SLUGS), {
+            REPORTS: mask('get_list'),
+            BILLING: mask('delete_obj'),
+        })
+
+    def test_compile_role_closure(self):
+        self.assertEqual(
+            compile_role_closure([('b', 'a'), ('c', 'b'), ('a', 'c')])['a'],
+            {'a', 'b', 'c'}
+        )
+        self.assertEqual(compile_role_closure([('b', 'a')]), {
+            'a': {'a'}, 'b': {'a', 'b'},
+        })
+
+
+class VersionWatcherTests(TestCase):
+    """Версии областей и сброс кэшей процессов."""
+
+    def setUp(self):
+        LocalMemoryChannel.clear()
+        self.addCleanup(LocalMemoryChannel.clear)
+        self.cleared = []
+        self.evicted = []
+
+    def make_watcher(self, channel):
+        watcher = VersionWatcher(channel)
+        watcher.connect(
+            AUTHZ_SCOPE_USERS,
+            lambda: self.cleared.append(True),
+            evict=self.evicted.append
+        )
+        return watcher
+
+    def get_version(self):
+        return AuthorizationVersion.objects.get(
+            scope=AUTHZ_SCOPE_USERS
+        ).version
+
+    def test_local_memory_channel(self):
+        writer = self.make_watcher(LocalMemoryChannel())
+        reader = self.make_watcher(LocalMemoryChannel())
+        self.assertTrue(reader.sync())
+        self.assertEqual(len(self.cleared), 1)
+        self.assertFalse(reader.sync())
+        writer.publish(AUTHZ_SCOPE_USERS, {1, 2})
+        self.assertTrue(reader.sync())
+        self.assertEqual(self.evicted, [{1, 2}])
+        writer.publish(AUTHZ_SCOPE_USERS)
+        self.assertTrue(reader.sync())
+        self.assertEqual(len(self.cleared), 2)
+
+    def test_bump_once_per_transaction(self):
+        watcher = self.make_watcher(DatabaseChannel(poll_interval=0))
+        watcher.sync()
+        version = self.get_version()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                watcher.bump(AUTHZ_SCOPE_USERS, keys=[5])
+                watcher.bump(AUTHZ_SCOPE_USERS, keys=[5, 6])
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self.get_version(), version + 1)
+        self.assertEqual(sorted(AuthorizationChange.objects.filter(
+            scope=AUTHZ_SCOPE_USERS
+        ).values_list('key', flat=True)), [5, 6])
+        self.assertTrue(watcher.sync(force=True))
+        self.assertEqual(self.evicted, [{5, 6}])
+
+    def test_bump_rolled_back(self):
+        watcher = self.make_watcher(DatabaseChannel(poll_interval=0))
+        version = self.get_version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            with self.assertRaises(ZeroDivisionError):
+                with transaction.atomic():
+                    watcher.bump(AUTHZ_SCOPE_USERS, keys=[5])
+                    1 / 0
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.get_version(), version)
+
+    def test_bump_without_keys_clears_scope(self):
+        watcher = self.make_watcher(DatabaseChannel(poll_interval=0))
+        watcher.sync()
+        self.cleared.clear()
+        watcher.bump(AUTHZ_SCOPE_USERS)
+        self.assertTrue(watcher.sync(force=True))
+        self.assertEqual(self.cleared, [True])
+        self.assertEqual(self.evicted, [])
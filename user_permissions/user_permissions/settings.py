@@ -47,6 +47,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
@@ -56,6 +57,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -148,7 +150,10 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.PrincipalJWTAuthentication',
+    ),
+    'DEFAULT_PERMISSION_CLASSES': (
+        'permissions.permissions.RegistryPermission',
     ),
 
     'DEFAULT_PAGINATION_CLASS': (
@@ -165,4 +170,45 @@ SIMPLE_JWT = {
     'SIGNING_KEY': SECRET_KEY,
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
+    'TOKEN_REFRESH_SERIALIZER': 'api.serializers.RolesTokenRefreshSerializer',
+}
+
+USER_PERMISSIONS = {
+    # Передавать роли пользователя и версию его прав в JWT-токене.
+    'TOKEN_ROLE_CLAIMS': os.getenv('TOKEN_ROLE_CLAIMS', 'False') == 'True',
+    # Размер пула потоков для проверки паролей в асинхронных представлениях.
+    'ASYNC_PASSWORD_WORKERS': int(os.getenv('ASYNC_PASSWORD_WORKERS', 4)),
+    # Время кэширования общего числа объектов в списках, в секундах.
+    'PAGINATION_COUNT_CACHE_TIMEOUT': 60,
+    # Режим поиска по email и именам в API и в админ-панели:
+    # 'trigram' - по подстроке, 'prefix' - по началу строки.
+    'SEARCH_MODE': os.getenv('SEARCH_MODE', 'trigram'),
+    'ADMIN_SEARCH_MODE': os.getenv('ADMIN_SEARCH_MODE', 'prefix'),
+    # Время жизни в памяти процесса состояния пользователя (is_active,
+    # администратор, версия прав) для аутентификации без запроса к БД.
+    'USER_STATE_CACHE_TTL': int(os.getenv('USER_STATE_CACHE_TTL', 30)),
+    # Журнал решений о доступе: 'db' - таблица AuthorizationAudit,
+    # 'jsonl' - файл AUDIT_FILE с ротацией, пустое значение - отключен.
+    'AUDIT_SINK': os.getenv('AUDIT_SINK', 'db') or None,
+    'AUDIT_FILE': os.getenv('AUDIT_FILE', BASE_DIR / 'logs' / 'audit.jsonl'),
+    # Токен для /api/v1/metrics/. Без токена метрики доступны только при
+    # DEBUG или METRICS_PUBLIC=True, например если эндпоинт закрыт снаружи
+    # сетевыми правилами.
+    'METRICS_TOKEN': os.getenv('METRICS_TOKEN'),
+    'METRICS_PUBLIC': os.getenv('METRICS_PUBLIC', 'False') == 'True',
+    # Превышение бюджета SQL-запросов представления: исключение (True)
+    # или только запись в лог и метрику (False). По умолчанию (None) равно
+    # DEBUG, в тестовых настройках включено; переменная окружения
+    # QUERY_BUDGET_RAISE переопределяет значение.
+    'QUERY_BUDGET_RAISE': {'True': True, 'False': False}.get(
+        os.getenv('QUERY_BUDGET_RAISE', '')
+    ),
+    # Канал версий прав доступа между процессами: 'db' - опрос таблицы
+    # AuthorizationVersion не чаще раза в AUTHZ_POLL_INTERVAL секунд,
+    # 'locmem' - в памяти процесса (для тестов), либо путь к классу.
+    'AUTHZ_CHANNEL': os.getenv('AUTHZ_CHANNEL', 'db'),
+    'AUTHZ_POLL_INTERVAL': float(os.getenv('AUTHZ_POLL_INTERVAL', 1.0)),
+    # Файл снимка прав (команда export_permissions_snapshot), который
+    # рабочие процессы загружают при запуске; пустое значение - отключен.
+    'AUTHZ_SNAPSHOT': os.getenv('AUTHZ_SNAPSHOT') or None,
 }
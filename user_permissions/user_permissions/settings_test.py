@@ -0,0 +1,15 @@
+"""Настройки для запуска тестов: python manage.py test.
+
+Тестовый прогон Django выключает DEBUG, поэтому превышение бюджета
+SQL-запросов здесь включено явно. Журнал аудита отключен, чтобы фоновый
+поток не держал подключение к тестовой базе данных.
+"""
+from .settings import *  # noqa: F401, F403
+from .settings import USER_PERMISSIONS
+
+
+USER_PERMISSIONS = {
+    **USER_PERMISSIONS,
+    'QUERY_BUDGET_RAISE': True,
+    'AUDIT_SINK': None,
+}
@@ -14,3 +14,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'user_permissions.settings')
 
 application = get_wsgi_application()
+
+# Снимок прав загружается и фиктивный хеш пароля считается только в
+# процессах сервера, а не в командах управления (см. permissions.snapshot).
+# Без этого первый вход с неизвестным email был бы заметно медленнее.
+from permissions.snapshot import load_snapshot  # noqa: E402
+from users.utils import get_dummy_password_hash  # noqa: E402
+
+load_snapshot()
+get_dummy_password_hash()
@@ -1,37 +1,131 @@
 """Настройка админ-панели для модели пользователя."""
+from functools import partial
+
 from django.contrib import admin
+from django.contrib.postgres.aggregates import StringAgg
 
-from .constants import ROLE_GUEST
-from .models import Roles, User
+from .constants import ROLE_GUEST, SEARCH_MODE_PREFIX
+from .models import RoleDefinitions, Roles, User
+from .services import assign_roles, deactivate_users
+from .utils import get_setting
 
 
 admin.site.empty_value_display = 'Не задано'
 
 
+class IndexedSearchMixin:
+    """Поиск по началу строки в режиме ADMIN_SEARCH_MODE='prefix'.
+
+    В этом режиме поля поиска без префикса получают префикс '^', и
+    запрос обслуживается индексами по UPPER(поле) с text_pattern_ops.
+    """
+
+    def get_search_fields(self, request):
+        search_fields = super().get_search_fields(request)
+        if get_setting('ADMIN_SEARCH_MODE') != SEARCH_MODE_PREFIX:
+            return search_fields
+        return tuple(
+            field if field[0] in '^=@' else f'^{field}'
+            for field in search_fields
+        )
+
+
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(IndexedSearchMixin, admin.ModelAdmin):
     """Расширенная модель пользователя для администрирования."""
 
     search_fields = ('email', 'first_name', 'last_name')
     list_display = ('email', 'get_user_roles', 'date_joined')
     empty_value_display = '-пусто-'
+    actions = ('deactivate',)
+
+    def get_queryset(self, request):
+        """Роли пользователя собираются в одну колонку в том же запросе."""
+        return super().get_queryset(request).annotate(
+            role_names=StringAgg(
+                'roles__role', delimiter=', ', ordering='roles__role'
+            )
+        )
 
-    @admin.display(description='Роли пользователя')
+    def get_actions(self, request):
+        """Добавляет действие назначения для каждой роли справочника."""
+        actions = super().get_actions(request)
+        if self.has_change_permission(request):
+            for role, description in RoleDefinitions.objects.values_list(
+                'name', 'description'
+            ):
+                name = f'assign_role_{role}'
+                actions[name] = (
+                    partial(self.assign_role, role=role),
+                    name,
+                    f'Назначить роль «{description or role}»'
+                )
+        return actions
+
+    @admin.display(description='Роли пользователя', ordering='role_names')
     def get_user_roles(self, obj):
-        return ', '.join([role.role for role in obj.roles.all()])
+        return obj.role_names
+
+    def assign_role(self, modeladmin, request, queryset, role):
+        """Назначает роль выбранным активным пользователям одним INSERT.
+
+        Удаленным (неактивным) пользователям роль не назначается, их число
+        выводится в сообщении.
+        """
+        user_ids = list(queryset.values_list('pk', 'is_active'))
+        count = assign_roles(
+            (user_id, role) for user_id, is_active in user_ids if is_active
+        )
+        skipped = sum(not is_active for _, is_active in user_ids)
+        message = f'Назначено ролей: {count}.'
+        if skipped:
+            message += f' Пропущено удаленных пользователей: {skipped}.'
+        self.message_user(request, message)
 
     def save_model(self, request, obj, form, change):
         super().save_model(request, obj, form, change)
         if not obj.roles.exists():
             obj.roles.create(role=ROLE_GUEST)
 
+    @admin.action(description='Деактивировать и заблокировать токены')
+    def deactivate(self, request, queryset):
+        count = deactivate_users(queryset.values_list('pk', flat=True))
+        self.message_user(request, f'Деактивировано пользователей: {count}.')
+
 
 @admin.register(Roles)
-class RolesAdmin(admin.ModelAdmin):
+class RolesAdmin(IndexedSearchMixin, admin.ModelAdmin):
     """Расширенная модель пользователя для администрирования."""
 
-    search_fields = ('user__email', 'role', 'user__id')
+    search_fields = ('user__email',)
     list_display = ('user__id', 'user', 'role')
+    list_select_related = ('user',)
+    list_filter = ('role',)
     list_display_links = ('user',)
     list_editable = ('role',)
     empty_value_display = '-пусто-'
+
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по email, а для числа - еще и по id пользователя."""
+        results, may_have_duplicates = super().get_search_results(
+            request, queryset, search_term
+        )
+        if search_term.strip().isdigit():
+            results |= queryset.filter(user_id=int(search_term))
+        return results, may_have_duplicates
+
+
+@admin.register(RoleDefinitions)
+class RoleDefinitionsAdmin(admin.ModelAdmin):
+    """Справочник ролей и их наследования."""
+
+    search_fields = ('name', 'description')
+    list_display = ('name', 'description', 'get_parents')
+    filter_horizontal = ('parents',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('parents')
+
+    @admin.display(description='Наследует права ролей')
+    def get_parents(self, obj):
+        return ', '.join(parent.name for parent in obj.parents.all())
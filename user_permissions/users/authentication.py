@@ -0,0 +1,209 @@
+"""Аутентификация по JWT-токену с ролями пользователя."""
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken
+)
+from rest_framework_simplejwt.settings import api_settings
+
+from .cache import UserState, user_state_cache
+from .constants import AUTHZ_VERSION_CLAIM, EMAIL_CLAIM, ROLES_CLAIM
+from .models import User
+from permissions.metrics import untracked_queries
+
+USER_STATE_FIELDS = ('is_active', 'is_superuser', 'is_staff', 'authz_version')
+
+
+class TokenPrincipal:
+    """Пользователь запроса, построенный по токену без модели User.
+
+    Содержит только то, что нужно для проверки прав. Представления,
+    которым нужна строка users_user, загружают ее явно через
+    get_user_instance().
+    """
+
+    __slots__ = ('id', 'email', 'is_active', 'is_admin', 'authz_roles')
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, id, email, is_active, is_admin, authz_roles=None):
+        self.id = id
+        self.email = email
+        self.is_active = is_active
+        self.is_admin = is_admin
+        self.authz_roles = authz_roles
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __str__(self) -> str:
+        return self.email
+
+
+def get_user_instance(user):
+    """Возвращает модель User для пользователя запроса."""
+    if isinstance(user, TokenPrincipal):
+        return User.objects.get(pk=user.pk)
+    return user
+
+
+async def aget_user_instance(user):
+    """Асинхронный вариант get_user_instance."""
+    if isinstance(user, TokenPrincipal):
+        return await User.objects.aget(pk=user.pk)
+    return user
+
+
+def _user_state_queryset(user_id):
+    return User.objects.filter(pk=user_id).values_list(*USER_STATE_FIELDS)
+
+
+def _make_state(row):
+    is_active, is_superuser, is_staff, authz_version = row
+    return UserState(is_active, is_superuser and is_staff, authz_version)
+
+
+class RolesJWTAuthentication(JWTAuthentication):
+    """Берет роли пользователя из токена, если они не устарели.
+
+    Роли из токена используются, только когда версия прав в токене
+    совпадает с authz_version пользователя. Иначе роли будут заново
+    получены из базы данных механизмом авторизации.
+    """
+
+    def get_user(self, validated_token):
+        """Получение пользователя и его ролей из токена."""
+        user = super().get_user(validated_token)
+        self.apply_role_claims(user, validated_token)
+        return user
+
+    def apply_role_claims(self, user, validated_token):
+        """Передает пользователю актуальные роли из токена."""
+        roles = validated_token.get(ROLES_CLAIM)
+        version = validated_token.get(AUTHZ_VERSION_CLAIM)
+        if roles is not None and version == user.authz_version:
+            user.authz_roles = frozenset(roles)
+
+    async def aauthenticate(self, request):
+        """Асинхронная аутентификация запроса Django.
+
+        Возвращает пользователя или None, если токен не передан.
+        Ошибки токена выбрасываются как AuthenticationFailed.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                'В токене нет идентификатора пользователя.'
+            )
+        user = await User.objects.filter(
+            **{api_settings.USER_ID_FIELD: user_id}
+        ).afirst()
+        if user is None or not user.is_active:
+            raise AuthenticationFailed(
+                'Пользователь не найден или удален.',
+                code='user_not_found'
+            )
+        self.apply_role_claims(user, validated_token)
+        return user
+
+
+class PrincipalJWTAuthentication(RolesJWTAuthentication):
+    """Аутентификация по токену с ролями без чтения строки пользователя.
+
+    Если в токене есть email, роли и версия прав (настройка
+    TOKEN_ROLE_CLAIMS), request.user - TokenPrincipal, а из базы данных
+    берется только состояние пользователя, и то не чаще раза в
+    USER_STATE_CACHE_TTL секунд (см. users.cache). Роли из токена
+    используются, пока версия прав в токене совпадает с версией
+    пользователя, иначе - роли из состояния, если они известны (после
+    загрузки снимка прав). Токены без этих утверждений обрабатываются
+    как в RolesJWTAuthentication.
+    """
+
+    def get_user(self, validated_token):
+        """Пользователь запроса по токену и кэшу состояния."""
+        if not self.has_principal_claims(validated_token):
+            return super().get_user(validated_token)
+        user_id = self.get_user_id(validated_token)
+        state = user_state_cache.get(user_id)
+        if state is None:
+            # Заполнение кэша, как и загрузка матрицы прав, в бюджет
+            # SQL-запросов представления не входит.
+            with untracked_queries():
+                row = _user_state_queryset(user_id).first()
+            state = self.cache_state(user_id, row)
+        return self.make_principal(user_id, validated_token, state)
+
+    async def aauthenticate(self, request):
+        """Асинхронная аутентификация с TokenPrincipal."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        if not self.has_principal_claims(validated_token):
+            return await super().aauthenticate(request)
+        user_id = self.get_user_id(validated_token)
+        state = user_state_cache.get(user_id)
+        if state is None:
+            with untracked_queries():
+                row = await _user_state_queryset(user_id).afirst()
+            state = self.cache_state(user_id, row)
+        return self.make_principal(user_id, validated_token, state)
+
+    def has_principal_claims(self, validated_token) -> bool:
+        return all(
+            claim in validated_token
+            for claim in (EMAIL_CLAIM, ROLES_CLAIM, AUTHZ_VERSION_CLAIM)
+        )
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                'В токене нет идентификатора пользователя.'
+            )
+
+    def cache_state(self, user_id, row):
+        """Запоминает состояние пользователя, прочитанное из базы."""
+        if row is None:
+            raise AuthenticationFailed(
+                'Пользователь не найден или удален.',
+                code='user_not_found'
+            )
+        state = _make_state(row)
+        user_state_cache.set(user_id, state)
+        return state
+
+    def make_principal(self, user_id, validated_token, state):
+        """Собирает TokenPrincipal из утверждений токена и состояния."""
+        if not state.is_active:
+            raise AuthenticationFailed(
+                'Пользователь не найден или удален.',
+                code='user_inactive'
+            )
+        roles = None
+        if validated_token[AUTHZ_VERSION_CLAIM] == state.authz_version:
+            roles = frozenset(validated_token[ROLES_CLAIM])
+        elif state.roles is not None:
+            roles = state.roles
+        return TokenPrincipal(
+            user_id,
+            validated_token[EMAIL_CLAIM],
+            state.is_active,
+            state.is_admin,
+            roles
+        )
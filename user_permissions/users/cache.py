@@ -0,0 +1,93 @@
+"""Кэш состояния пользователей в памяти процесса.
+
+Аутентификация по токену без чтения строки users_user хранит здесь
+is_active, признак администратора и версию прав пользователя на
+USER_STATE_CACHE_TTL секунд. Изменения в текущем процессе (деактивация,
+смена ролей, изменение is_active, is_staff или is_superuser) сбрасывают
+запись сразу, другие процессы сбрасывают записи этих пользователей при
+сверке версий (см. permissions.coherence).
+"""
+import threading
+import time
+from itertools import islice
+from typing import NamedTuple
+
+from django.db import transaction
+
+from .constants import USER_STATE_CACHE_SIZE
+from .utils import get_setting
+
+
+class UserState(NamedTuple):
+    """Состояние пользователя, нужное для аутентификации."""
+
+    is_active: bool
+    is_admin: bool
+    authz_version: int
+    # Роли пользователя при этой версии прав, если известны (например,
+    # из снимка прав, см. permissions.snapshot).
+    roles: frozenset = None
+
+
+class UserStateCache:
+    """Кэш {user_id: UserState} с ограниченным временем жизни записей."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states = {}
+
+    def get(self, user_id):
+        """Возвращает состояние пользователя или None, если его нет."""
+        entry = self._states.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, user_id, state: UserState):
+        """Запоминает состояние пользователя."""
+        now = time.monotonic()
+        with self._lock:
+            if len(self._states) >= USER_STATE_CACHE_SIZE:
+                self._states = {
+                    key: entry for key, entry in self._states.items()
+                    if entry[0] >= now
+                }
+                if len(self._states) >= USER_STATE_CACHE_SIZE:
+                    self._states.clear()
+            self._states[user_id] = (
+                now + get_setting('USER_STATE_CACHE_TTL'), state
+            )
+
+    def set_many(self, states: dict) -> int:
+        """Запоминает состояния {user_id: UserState} в пределах размера кэша.
+
+        Возвращает число запомненных состояний.
+        """
+        expires = time.monotonic() + get_setting('USER_STATE_CACHE_TTL')
+        with self._lock:
+            free = max(USER_STATE_CACHE_SIZE - len(self._states), 0)
+            states = dict(islice(states.items(), free))
+            self._states.update(
+                (user_id, (expires, state))
+                for user_id, state in states.items()
+            )
+        return len(states)
+
+    def invalidate(self, user_ids):
+        """Сбрасывает записи пользователей после фиксации транзакции."""
+        user_ids = list(user_ids)
+        transaction.on_commit(lambda: self.discard(user_ids))
+
+    def discard(self, user_ids):
+        """Сразу сбрасывает записи пользователей."""
+        with self._lock:
+            for user_id in user_ids:
+                self._states.pop(user_id, None)
+
+    def clear(self):
+        """Сбрасывает весь кэш."""
+        with self._lock:
+            self._states.clear()
+
+
+user_state_cache = UserStateCache()
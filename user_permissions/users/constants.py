@@ -3,6 +3,9 @@ ROLE_GUEST = 'guest'
 ROLE_USER: str = 'user'
 ROLE_MANAGER: str = 'manager'
 ROLE_ADMIN: str = 'admin'
+ROLE_MAX_LENGTH = 50
+# Начальный справочник ролей, дальше роли задаются как данные
+# (модель RoleDefinitions).
 ROLES = [
     (ROLE_GUEST, 'Гость'),
     (ROLE_USER, 'Активный пользователь'),
@@ -19,3 +22,37 @@ MODEL_NAME = 'Roles'
 USER_LOGIN_REGISTER_DELETE = ['POST']
 USER_UPDATE_METHODS_LIST = ['GET', 'PATCH']
 USER_ROLES_METHODS = ['get', 'post', 'patch', 'delete']
+ROLES_BULK_LIMIT = 10000
+USERS_BATCH_SIZE = 1000
+TOKENS_PRUNE_BATCH_SIZE = 5000
+IMPORT_USER_FIELDS = (
+    'email', 'password', 'first_name', 'last_name', 'sur_name'
+)
+SEARCH_FIELDS = ('email', 'first_name', 'last_name')
+SEARCH_MODE_PREFIX = 'prefix'
+SEARCH_MODE_TRIGRAM = 'trigram'
+USER_PERMISSIONS_DEFAULTS = {
+    'TOKEN_ROLE_CLAIMS': False,
+    'ASYNC_PASSWORD_WORKERS': 4,
+    'PAGINATION_COUNT_CACHE_TIMEOUT': 60,
+    'SEARCH_MODE': SEARCH_MODE_TRIGRAM,
+    'ADMIN_SEARCH_MODE': SEARCH_MODE_PREFIX,
+    'USER_STATE_CACHE_TTL': 30,
+    'AUDIT_SINK': None,
+    'AUDIT_FILE': 'audit.jsonl',
+    'METRICS_TOKEN': None,
+    'METRICS_PUBLIC': False,
+    'QUERY_BUDGET_RAISE': None,
+    'AUTHZ_CHANNEL': 'db',
+    'AUTHZ_POLL_INTERVAL': 1.0,
+    'AUTHZ_SNAPSHOT': None,
+}
+ROLES_CLAIM = 'roles'
+AUTHZ_VERSION_CLAIM = 'authz_version'
+EMAIL_CLAIM = 'email'
+USER_STATE_CACHE_SIZE = 100000
+# Одна ошибка входа для неизвестного email, удаленного аккаунта и
+# неверного пароля, чтобы по ответу нельзя было узнать, чем они отличаются.
+INVALID_CREDENTIALS_MESSAGE = 'Неверный email или пароль.'
+# Поля пользователя, от которых зависит его аутентификация и доступ.
+USER_AUTHZ_FIELDS = frozenset(('is_active', 'is_staff', 'is_superuser'))
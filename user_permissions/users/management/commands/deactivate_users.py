@@ -0,0 +1,32 @@
+"""Команда для массовой деактивации пользователей."""
+from django.core.management.base import BaseCommand
+
+from users.models import User
+from users.services import deactivate_users
+
+
+class Command(BaseCommand):
+    help = (
+        'Деактивирует пользователей по email и заносит все их '
+        'действующие токены в черный список.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('emails', nargs='*', help='Email пользователей.')
+        parser.add_argument(
+            '--file',
+            help='Файл со списком email, по одному на строку.'
+        )
+
+    def handle(self, *args, **options):
+        emails = set(options['emails'])
+        if options['file']:
+            with open(options['file'], encoding='utf-8') as file:
+                emails.update(line.strip() for line in file if line.strip())
+        user_ids = User.objects.filter(
+            email__in=emails
+        ).values_list('pk', flat=True)
+        count = deactivate_users(user_ids)
+        self.stdout.write(
+            self.style.SUCCESS(f'Деактивировано пользователей: {count}.')
+        )
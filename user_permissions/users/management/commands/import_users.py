@@ -0,0 +1,101 @@
+"""Команда для массового импорта пользователей из CSV или JSONL."""
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+
+from users.constants import IMPORT_USER_FIELDS, USERS_BATCH_SIZE
+from users.services import create_users
+
+
+def read_csv(file):
+    """Построчно читает пользователей из CSV с заголовком."""
+    yield from csv.DictReader(file)
+
+
+def read_jsonl(file):
+    """Построчно читает пользователей из JSONL: один объект на строку."""
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+READERS = {'csv': read_csv, 'jsonl': read_jsonl}
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует пользователей из CSV или JSONL с ролью гостя. '
+        'Файл читается потоково, пароли хешируются в пуле процессов, '
+        'пользователи и роли создаются порциями через bulk_create. '
+        'Пользователи с уже зарегистрированным email пропускаются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу с пользователями.')
+        parser.add_argument(
+            '--format', choices=READERS,
+            help='Формат файла, по умолчанию - по расширению.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=USERS_BATCH_SIZE,
+            help='Число пользователей в одной порции.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Число процессов для хеширования паролей.'
+        )
+
+    def hash_passwords(self, executor, passwords):
+        """Хеширует порцию паролей, распределяя ее между процессами."""
+        chunksize = max(len(passwords) // self.workers, 1)
+        return list(
+            executor.map(make_password, passwords, chunksize=chunksize)
+        )
+
+    def handle(self, *args, **options):
+        self.workers = options['workers']
+        file_format = options['format'] or os.path.splitext(
+            options['path']
+        )[1].lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError(
+                'Не удалось определить формат файла, укажите --format.'
+            )
+        total, created = 0, 0
+        started = time.monotonic()
+        with (
+            open(options['path'], encoding='utf-8', newline='') as file,
+            ProcessPoolExecutor(
+                max_workers=self.workers, initializer=django.setup
+            ) as executor
+        ):
+            rows = READERS[file_format](file)
+            while batch := list(islice(rows, options['batch_size'])):
+                users_data = [
+                    {
+                        field: row[field] for field in IMPORT_USER_FIELDS
+                        if row.get(field)
+                    }
+                    for row in batch if row.get('email')
+                ]
+                total += len(batch)
+                created += create_users(
+                    users_data, partial(self.hash_passwords, executor)
+                )
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'Обработано {total}, создано {created}, '
+                    f'{total / max(elapsed, 1e-6):.0f} строк/с'
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f'Импорт завершен: создано {created} из {total} '
+            f'за {time.monotonic() - started:.1f} с.'
+        ))
@@ -0,0 +1,62 @@
+"""Команда для удаления истекших токенов."""
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.constants import TOKENS_PRUNE_BATCH_SIZE
+from users.services import prune_expired_tokens
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет истекшие выданные токены и их записи в черном списке '
+        'порциями. Прерванный запуск можно продолжить с --after-id.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=TOKENS_PRUNE_BATCH_SIZE,
+            help='Число токенов, удаляемых одной транзакцией.'
+        )
+        parser.add_argument(
+            '--after-id', type=int, default=0,
+            help='Начать с токенов, id которых больше указанного.'
+        )
+        parser.add_argument(
+            '--max-batches', type=int, default=None,
+            help='Остановиться после указанного числа порций.'
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=0,
+            help='Пауза между порциями в секундах.'
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        after_id = options['after_id']
+        total, batches = 0, 0
+        started = time.monotonic()
+        while options['max_batches'] is None or (
+            batches < options['max_batches']
+        ):
+            deleted, last_id = prune_expired_tokens(
+                options['batch_size'], after_id, now
+            )
+            if last_id is None:
+                break
+            total += deleted
+            batches += 1
+            after_id = last_id
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'Порция {batches}: удалено {deleted}, последний id '
+                f'{last_id}, {total / max(elapsed, 1e-6):.0f} токенов/с'
+            )
+            if options['sleep']:
+                time.sleep(options['sleep'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено токенов: {total} за {elapsed:.1f} с. '
+            f'Для продолжения: --after-id {after_id}'
+        ))
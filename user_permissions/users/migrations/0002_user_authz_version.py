@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-18 10:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='authz_version',
+            field=models.PositiveIntegerField(default=0, help_text='Увеличивается при каждом изменении ролей пользователя.', verbose_name='Версия прав доступа'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+INDEX_NAME = 'token_blacklist_outstanding_expires_at_idx'
+TABLE_NAME = 'token_blacklist_outstandingtoken'
+
+
+def create_index(apps, schema_editor):
+    quote = schema_editor.quote_name
+    concurrently = (
+        'CONCURRENTLY ' if schema_editor.connection.vendor == 'postgresql'
+        else ''
+    )
+    schema_editor.execute(
+        f'CREATE INDEX {concurrently}IF NOT EXISTS {quote(INDEX_NAME)} '
+        f'ON {quote(TABLE_NAME)} (expires_at)'
+    )
+
+
+def drop_index(apps, schema_editor):
+    concurrently = (
+        'CONCURRENTLY ' if schema_editor.connection.vendor == 'postgresql'
+        else ''
+    )
+    schema_editor.execute(
+        f'DROP INDEX {concurrently}IF EXISTS '
+        f'{schema_editor.quote_name(INDEX_NAME)}'
+    )
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY нельзя выполнить внутри транзакции.
+    atomic = False
+
+    dependencies = [
+        ('users', '0002_user_authz_version'),
+        ('token_blacklist', '0012_alter_outstandingtoken_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
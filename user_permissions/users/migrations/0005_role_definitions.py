@@ -0,0 +1,63 @@
+# Generated by Django 5.1.1 on 2026-10-18 10:44
+
+import users.validators
+from django.db import migrations, models
+
+INITIAL_ROLES = [
+    ('guest', 'Гость'),
+    ('user', 'Активный пользователь'),
+    ('manager', 'Менеджер'),
+    ('admin', 'Администратор'),
+]
+
+
+def create_role_definitions(apps, schema_editor):
+    """Справочник из прежнего списка ролей, без наследования.
+
+    Права ролей при этом не меняются: наследование настраивается
+    отдельно, после чего повторяющиеся права можно удалить.
+    """
+    RoleDefinitions = apps.get_model('users', 'RoleDefinitions')
+    Roles = apps.get_model('users', 'Roles')
+    descriptions = dict(INITIAL_ROLES)
+    names = set(descriptions) | set(
+        Roles.objects.values_list('role', flat=True).distinct()
+    )
+    RoleDefinitions.objects.bulk_create(
+        [
+            RoleDefinitions(name=name, description=descriptions.get(name, ''))
+            for name in sorted(names)
+        ],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='roles',
+            name='role',
+            field=models.CharField(default='guest', max_length=50, validators=[users.validators.validate_role_name], verbose_name='Роль'),
+        ),
+        migrations.CreateModel(
+            name='RoleDefinitions',
+            fields=[
+                ('name', models.SlugField(primary_key=True, serialize=False, verbose_name='Роль')),
+                ('description', models.CharField(blank=True, max_length=150, verbose_name='Описание')),
+                ('parents', models.ManyToManyField(blank=True, related_name='children', to='users.roledefinitions', verbose_name='Наследует права ролей')),
+            ],
+            options={
+                'verbose_name': 'Описание роли',
+                'verbose_name_plural': 'Справочник ролей',
+                'ordering': ('name',),
+            },
+        ),
+        migrations.RunPython(
+            create_role_definitions, migrations.RunPython.noop
+        ),
+    ]
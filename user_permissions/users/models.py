@@ -1,12 +1,19 @@
 """Содержание основной модели пользователя."""
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
+from django.contrib.postgres.indexes import OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-from .constants import USER_CONSTANTS, ROLE_GUEST, ROLES
-from .utils import get_role_length
+from .constants import (
+    USER_CONSTANTS,
+    ROLE_GUEST,
+    ROLE_MAX_LENGTH,
+    SEARCH_FIELDS
+)
 from .managers import UserManager
+from .validators import validate_role_name
 
 
 class User(AbstractBaseUser, PermissionsMixin):
@@ -52,6 +59,13 @@ class User(AbstractBaseUser, PermissionsMixin):
         _('Дата регистрации'),
         default=timezone.now
     )
+    authz_version = models.PositiveIntegerField(
+        _('Версия прав доступа'),
+        default=0,
+        help_text=_(
+            'Увеличивается при каждом изменении ролей пользователя.'
+        )
+    )
 
     objects = UserManager()
 
@@ -62,6 +76,14 @@ class User(AbstractBaseUser, PermissionsMixin):
     class Meta:
         verbose_name = _('пользователь')
         verbose_name_plural = _('пользователи')
+        # Индексы для поиска по началу строки: UPPER(поле) LIKE 'TERM%'.
+        indexes = [
+            models.Index(
+                OpClass(Upper(field), name='text_pattern_ops'),
+                name=f'user_{field}_prefix_idx'
+            )
+            for field in SEARCH_FIELDS
+        ]
 
     def __str__(self) -> str:
         return self.email
@@ -86,6 +108,43 @@ class User(AbstractBaseUser, PermissionsMixin):
         return self.is_superuser and self.is_staff
 
 
+class RoleDefinitions(models.Model):
+    """Справочник ролей проекта и их наследования.
+
+    Роль получает все права ролей из parents, в том числе унаследованные
+    ими, поэтому в Permissions достаточно хранить только права, которые
+    отличают роль от родительских.
+    """
+
+    name = models.SlugField(
+        verbose_name='Роль',
+        max_length=ROLE_MAX_LENGTH,
+        primary_key=True,
+    )
+    description = models.CharField(
+        verbose_name='Описание',
+        max_length=USER_CONSTANTS['names'],
+        blank=True,
+    )
+    parents = models.ManyToManyField(
+        'self',
+        symmetrical=False,
+        related_name='children',
+        blank=True,
+        verbose_name='Наследует права ролей',
+    )
+
+    class Meta:
+        """Meta класс модели RoleDefinitions."""
+
+        ordering = ('name',)
+        verbose_name = 'Описание роли'
+        verbose_name_plural = 'Справочник ролей'
+
+    def __str__(self) -> str:
+        return self.name
+
+
 class Roles(models.Model):
     """Задаем роли пользователей."""
 
@@ -97,11 +156,14 @@ class Roles(models.Model):
     )
     role = models.CharField(
         verbose_name='Роль',
-        max_length=get_role_length(ROLES),
-        choices=ROLES,
+        max_length=ROLE_MAX_LENGTH,
         default=ROLE_GUEST,
+        validators=[validate_role_name],
     )
 
+    # Владелец объекта для OwnerFilter (см. permissions.filters).
+    OWNER_FIELD = 'user'
+
     class Meta:
         """Meta класс модели User."""
 
@@ -1,15 +1,11 @@
-from django.shortcuts import get_object_or_404
+from time import perf_counter
+
 from rest_framework import permissions
 
-from permissions.models import BusinessElements, Permissions
-from users.constants import (
-    APP_NAME,
-    ROLE_ADMIN,
-    USER_LOGIN_REGISTER_DELETE,
-    USER_ROLES_METHODS,
-    USER_UPDATE_METHODS_LIST
-)
-from users.models import Roles
+from permissions.audit import record_decision
+from permissions.constants import METHOD_ACTIONS, OWNER_ACTIONS
+from permissions.context import get_authorization_context
+from permissions.filters import OwnerFilter
 
 
 class BasicPermission(permissions.BasePermission):
@@ -17,72 +13,72 @@ class BasicPermission(permissions.BasePermission):
 
     def has_permission(self, request, view):
         """Проверка неаутентицированного администратора."""
-        print('Zaprashivau', request.user.is_admin)
         return request.user.is_admin
 
 
-class IsAuthenticatedAndRolesUsers(BasicPermission):
-    """Проверка is_authenticated и доступа по роли пользователя."""
+class EnginePermission(BasicPermission):
+    """Проверка прав доступа через единый механизм авторизации.
 
-    def has_permission(self, request, view):
-        """Проверка для ролей и типа запросов."""
-        if request.user.is_authenticated:
-            user_roles = Roles.objects.filter(user=request.user)
-            application = get_object_or_404(BusinessElements, slug=APP_NAME)
-            if (
-                request.method in USER_UPDATE_METHODS_LIST
-                or request.method in USER_LOGIN_REGISTER_DELETE
-            ):
-                for role in user_roles:
-                    permission = Permissions.objects.get(
-                        business_element=application.id,
-                        role=role.role
-                    )
-                    return (
-                        (permission.get_list_permission is True
-                         and request.method == 'GET'
-                         )
-                        or (
-                            permission.partial_update_obj_permission is True
-                            and request.method == 'PATCH'
-                        )
-                        or (
-                            permission.create_obj_permission is True
-                            and request.method == 'POST'
-                        )
-                    )
-                return super().has_permission(request, view)
+    Роли пользователя и права берутся из контекста авторизации запроса
+    (см. permissions.context), общего для всех классов разрешений.
+    Наследники задают приложение, допустимые методы запроса, действия,
+    соответствующие методам, и, при необходимости, роли, которыми
+    ограничена проверка. Представление может переопределить действие
+    для своих action через атрибут permission_actions.
+
+    Если права на действие нет, но есть owner_permission, а
+    представление ограничивает queryset фильтром OwnerFilter, запрос
+    пропускается только к собственным объектам пользователя. Действия,
+    доступные автору, задаются атрибутом представления owner_actions
+    (по умолчанию только чтение). Ограничение roles на доступ автора
+    не распространяется: к своим объектам автор допускается по
+    owner_permission любой своей роли.
 
+    Каждое решение записывается в журнал аудита (см. permissions.audit).
+    """
 
-class IsAuthenticatedAndAdminUsers(BasicPermission):
-    """Проверка is_authenticated и доступа по роли Админ."""
+    app_name = None
+    methods = ()
+    method_actions = METHOD_ACTIONS
+    roles = None
 
     def has_permission(self, request, view):
-        """Проверка для роли Admin на действия с объектами."""
-        if request.user.is_authenticated:
-            user_roles = Roles.objects.filter(user=request.user)
-            application = get_object_or_404(BusinessElements, slug=APP_NAME)
-            if request.method in [_.upper() for _ in USER_ROLES_METHODS]:
-                for role in user_roles:
-                    if role.role == ROLE_ADMIN:
-                        permission = Permissions.objects.get(
-                            business_element=application.id,
-                            role=role.role
-                        )
-                        return (
-                            (permission.get_list_permission is True
-                             and request.method == 'GET'
-                             )
-                            or (
-                                permission.create_obj_permission is True
-                                and request.method == 'POST'
-                            )
-                            or (
-                                permission.partial_update_obj_permission is True
-                                and request.method == 'PATCH'
-                            )
-                            or (permission.delete_obj_permission is True
-                                and request.method == 'DELETE'
-                                )
-                        )
-                return super().has_permission(request, view)
+        """Проверка прав с записью решения в журнал аудита и метрики."""
+        start = perf_counter()
+        action = self.get_action(request, view)
+        allowed = self.is_allowed(request, view, action)
+        return record_decision(
+            request.user, self.app_name, action, allowed, start
+        )
+
+    def is_allowed(self, request, view, action):
+        """Проверка прав всех ролей пользователя на метод запроса."""
+        if (
+            not request.user.is_authenticated
+            or request.method not in self.methods
+            or action is None
+        ):
+            return False
+        context = get_authorization_context(request)
+        if context.check(
+            self.app_name, action, roles=self.roles
+        ) or super().has_permission(request, view):
+            return True
+        if self.has_owner_permission(context, view, action):
+            context.owner_scoped = True
+            return True
+        return False
+
+    def has_owner_permission(self, context, view, action):
+        """Проверка доступа автора к своим объектам."""
+        return (
+            action in getattr(view, 'owner_actions', OWNER_ACTIONS)
+            and OwnerFilter.is_enabled(view)
+            and context.check(self.app_name, 'owner')
+        )
+
+    def get_action(self, request, view):
+        """Определяет проверяемое действие для запроса."""
+        view_actions = getattr(view, 'permission_actions', {})
+        action = view_actions.get(getattr(view, 'action', None))
+        return action or self.method_actions.get(request.method)
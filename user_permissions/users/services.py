@@ -0,0 +1,228 @@
+"""Сервисные функции для массовых операций с пользователями и ролями."""
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import connections, router, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken
+)
+
+from .constants import ROLE_GUEST, USERS_BATCH_SIZE
+from .models import Roles, User
+from .signals import bump_authz_version, invalidate_user_state
+
+
+def assign_roles(pairs):
+    """Назначает роли пользователям одним INSERT.
+
+    pairs - пары (user_id, role). Уже существующие роли пропускаются.
+    """
+    pairs = set(pairs)
+    with transaction.atomic():
+        Roles.objects.bulk_create(
+            [Roles(user_id=user_id, role=role) for user_id, role in pairs],
+            ignore_conflicts=True,
+        )
+        bump_authz_version({user_id for user_id, _ in pairs})
+    return len(pairs)
+
+
+def _placeholders(values) -> str:
+    return ', '.join(['%s'] * len(values))
+
+
+def _delete_rows(model, where: str, params) -> int:
+    """Удаляет строки таблицы модели одним DELETE без сигналов и каскадов.
+
+    where - условие SQL, params - его параметры. Возвращает число
+    удаленных строк.
+    """
+    connection = connections[router.db_for_write(model)]
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE {where}', params)
+        return cursor.rowcount
+
+
+def revoke_roles(pairs):
+    """Отзывает роли пользователей одним DELETE.
+
+    pairs - пары (user_id, role). У каждого пользователя должна остаться
+    хотя бы одна роль, иначе ни одна роль не отзывается и выбрасывается
+    ValidationError со списком id таких пользователей.
+    """
+    revoked = {}
+    for user_id, role in pairs:
+        revoked.setdefault(role, set()).add(user_id)
+    user_ids = set().union(*revoked.values())
+    with transaction.atomic():
+        list(
+            User.objects.select_for_update().filter(pk__in=user_ids)
+            .values_list('pk', flat=True)
+        )
+        remaining = {}
+        for user_id, role in Roles.objects.filter(
+            user_id__in=user_ids
+        ).values_list('user_id', 'role'):
+            remaining.setdefault(user_id, set()).add(role)
+        for role, role_user_ids in revoked.items():
+            for user_id in role_user_ids:
+                remaining.get(user_id, set()).discard(role)
+        left_without_roles = sorted(
+            user_id for user_id in user_ids if not remaining.get(user_id)
+        )
+        if left_without_roles:
+            raise ValidationError(
+                'У пользователя должна быть хотя бы одна роль.',
+                params={'user_ids': left_without_roles},
+            )
+        conditions, params = [], []
+        for role, role_user_ids in revoked.items():
+            conditions.append(
+                f'(role = %s AND user_id IN ({_placeholders(role_user_ids)}))'
+            )
+            params.extend([role, *role_user_ids])
+        # Явный DELETE вместо QuerySet.delete(): у Roles есть обработчики
+        # post_delete, и Django выбрал бы строки и отправил сигнал на
+        # каждую. Версия прав пользователей увеличивается ниже одним
+        # запросом на всю операцию.
+        deleted = _delete_rows(Roles, ' OR '.join(conditions), params)
+        bump_authz_version(user_ids)
+    return deleted
+
+
+def _blacklist_tokens(connection, where, params):
+    """Заносит токены в черный список одним INSERT ... SELECT.
+
+    where - условие на таблицу выданных токенов, params - его параметры.
+    Возвращает число добавленных в черный список токенов.
+    """
+    quote = connection.ops.quote_name
+    now = timezone.now()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(BlacklistedToken._meta.db_table)} '
+            '(token_id, blacklisted_at) '
+            f'SELECT id, %s FROM {quote(OutstandingToken._meta.db_table)} '
+            f'WHERE {where} AND expires_at > %s '
+            'ON CONFLICT (token_id) DO NOTHING',
+            [now, *params, now]
+        )
+        return cursor.rowcount
+
+
+def blacklist_user_tokens(user_ids) -> int:
+    """Заносит в черный список все действующие токены пользователей.
+
+    Для PostgreSQL и SQLite это один INSERT ... SELECT ... ON CONFLICT
+    DO NOTHING на каждые USERS_BATCH_SIZE пользователей, для остальных
+    баз - выборка id токенов и bulk_create.
+    """
+    user_ids = list(user_ids)
+    connection = connections[router.db_for_write(BlacklistedToken)]
+    count = 0
+    for start in range(0, len(user_ids), USERS_BATCH_SIZE):
+        batch = user_ids[start:start + USERS_BATCH_SIZE]
+        if connection.vendor in ('postgresql', 'sqlite'):
+            placeholders = ', '.join(['%s'] * len(batch))
+            count += _blacklist_tokens(
+                connection, f'user_id IN ({placeholders})', batch
+            )
+            continue
+        token_ids = OutstandingToken.objects.filter(
+            user_id__in=batch, expires_at__gt=timezone.now()
+        ).values_list('id', flat=True)
+        count += len(BlacklistedToken.objects.bulk_create(
+            [BlacklistedToken(token_id=token_id) for token_id in token_ids],
+            ignore_conflicts=True,
+        ))
+    return count
+
+
+def blacklist_token(jti: str) -> int:
+    """Заносит в черный список выданный токен с указанным jti."""
+    connection = connections[router.db_for_write(BlacklistedToken)]
+    if connection.vendor in ('postgresql', 'sqlite'):
+        return _blacklist_tokens(connection, 'jti = %s', [jti])
+    token = OutstandingToken.objects.filter(jti=jti).first()
+    if token is None:
+        return 0
+    _, created = BlacklistedToken.objects.get_or_create(token=token)
+    return int(created)
+
+
+def deactivate_users(user_ids) -> int:
+    """Мягкое удаление пользователей с блокировкой их токенов.
+
+    Пользователи помечаются is_active=False одним UPDATE, их токены
+    заносятся в черный список в той же транзакции. Возвращает число
+    деактивированных пользователей.
+    """
+    user_ids = list(user_ids)
+    with transaction.atomic():
+        count = User.objects.filter(
+            pk__in=user_ids, is_active=True
+        ).update(is_active=False)
+        blacklist_user_tokens(user_ids)
+        invalidate_user_state(user_ids)
+    return count
+
+
+def prune_expired_tokens(batch_size: int, after_id: int = 0, now=None):
+    """Удаляет одну порцию истекших токенов и их записи в черном списке.
+
+    Порция выбирается по первичному ключу после after_id, поэтому каждая
+    транзакция короткая и блокирует не больше batch_size строк.
+    Возвращает кортеж (число удаленных токенов, последний id порции);
+    последний id равен None, если истекших токенов больше нет.
+    """
+    now = now or timezone.now()
+    token_ids = list(
+        OutstandingToken.objects.filter(
+            id__gt=after_id, expires_at__lte=now
+        ).order_by('id').values_list('id', flat=True)[:batch_size]
+    )
+    if not token_ids:
+        return 0, None
+    where = f'IN ({_placeholders(token_ids)})'
+    with transaction.atomic():
+        # Каскад Django здесь не нужен: записи черного списка удаляются
+        # явно, одним DELETE на порцию, до удаления самих токенов.
+        _delete_rows(BlacklistedToken, f'token_id {where}', token_ids)
+        deleted = _delete_rows(OutstandingToken, f'id {where}', token_ids)
+    return deleted, token_ids[-1]
+
+
+def create_users(users_data, hash_passwords=None) -> int:
+    """Создает пользователей с ролью гостя двумя INSERT на порцию.
+
+    users_data - словари с полями модели User и паролем в открытом виде.
+    Пользователи с email, который уже есть в базе данных или повторяется
+    в порции, пропускаются до хеширования паролей. hash_passwords -
+    функция, которая принимает список паролей и возвращает список хешей,
+    например с хешированием в пуле процессов. Возвращает число созданных
+    пользователей.
+    """
+    users = {}
+    for data in users_data:
+        users.setdefault(User.objects.normalize_email(data['email']), data)
+    for email in User.objects.filter(
+        email__in=users
+    ).values_list('email', flat=True):
+        users.pop(email, None)
+    passwords = [data.get('password') for data in users.values()]
+    if hash_passwords is None:
+        passwords = [make_password(password) for password in passwords]
+    else:
+        passwords = hash_passwords(passwords)
+    new_users = [
+        User(**{**data, 'email': email, 'password': password})
+        for (email, data), password in zip(users.items(), passwords)
+    ]
+    with transaction.atomic():
+        User.objects.bulk_create(new_users)
+        Roles.objects.bulk_create(
+            [Roles(user_id=user.pk, role=ROLE_GUEST) for user in new_users]
+        )
+    return len(new_users)
@@ -0,0 +1,68 @@
+"""Обработчики сигналов приложения users."""
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .cache import user_state_cache
+from .constants import USER_AUTHZ_FIELDS
+from .models import Roles, User
+from permissions.coherence import version_watcher
+from permissions.constants import AUTHZ_SCOPE_USERS
+
+
+version_watcher.connect(
+    AUTHZ_SCOPE_USERS, user_state_cache.clear, evict=user_state_cache.discard
+)
+
+
+def bump_authz_version(user_ids):
+    """Увеличивает версию прав доступа пользователей одним запросом."""
+    User.objects.filter(pk__in=user_ids).update(
+        authz_version=F('authz_version') + 1
+    )
+    invalidate_user_state(user_ids)
+
+
+def invalidate_user_state(user_ids):
+    """Сбрасывает состояние пользователей в кэшах всех процессов."""
+    user_ids = list(user_ids)
+    version_watcher.bump(AUTHZ_SCOPE_USERS, keys=user_ids)
+    user_state_cache.invalidate(user_ids)
+
+
+def get_authz_state(user):
+    """Значения полей USER_AUTHZ_FIELDS или None, если они не загружены."""
+    if user.get_deferred_fields() & USER_AUTHZ_FIELDS:
+        return None
+    return tuple(getattr(user, field) for field in sorted(USER_AUTHZ_FIELDS))
+
+
+@receiver(post_save, sender=Roles)
+@receiver(post_delete, sender=Roles)
+def roles_changed(sender, instance, **kwargs):
+    """Делает устаревшими токены с прежним набором ролей пользователя."""
+    bump_authz_version([instance.user_id])
+
+
+@receiver(post_init, sender=User)
+def remember_authz_state(sender, instance, **kwargs):
+    """Запоминает поля доступа, чтобы после сохранения найти изменения."""
+    instance._authz_state = get_authz_state(instance)
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, update_fields, **kwargs):
+    """Сбрасывает кэши состояния пользователя, если изменился его доступ.
+
+    Версия увеличивается, только если у существующего пользователя
+    сохранено новое значение одного из USER_AUTHZ_FIELDS. Если поля не
+    были загружены, изменение считается возможным.
+    """
+    previous = getattr(instance, '_authz_state', None)
+    instance._authz_state = state = get_authz_state(instance)
+    if created or (
+        update_fields is not None and not USER_AUTHZ_FIELDS & update_fields
+    ):
+        return
+    if previous is None or state is None or previous != state:
+        invalidate_user_state([instance.pk])
@@ -0,0 +1,98 @@
+"""Тесты сервисов ролей и сброса состояния пользователей."""
+from django.core.exceptions import ValidationError
+from django.test import TestCase, TransactionTestCase
+
+from .cache import UserState, user_state_cache
+from .constants import ROLE_ADMIN, ROLE_GUEST, ROLE_USER
+from .models import Roles, User
+from .services import assign_roles, revoke_roles
+from permissions.constants import AUTHZ_SCOPE_USERS
+from permissions.models import AuthorizationChange
+
+
+class RoleServicesTests(TestCase):
+    """Массовое назначение и отзыв ролей."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.first = User.objects.create_user('first@mail.ru', 'test2025')
+        cls.second = User.objects.create_user('second@mail.ru', 'test2025')
+
+    def get_roles(self, user):
+        return set(Roles.objects.filter(user=user).values_list(
+            'role', flat=True
+        ))
+
+    def test_assign_roles(self):
+        assign_roles([
+            (self.first.pk, ROLE_USER),
+            (self.first.pk, ROLE_GUEST),
+            (self.second.pk, ROLE_ADMIN),
+        ])
+        self.assertEqual(self.get_roles(self.first), {ROLE_GUEST, ROLE_USER})
+        self.assertEqual(
+            self.get_roles(self.second), {ROLE_GUEST, ROLE_ADMIN}
+        )
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.authz_version, 2)
+
+    def test_revoke_roles(self):
+        assign_roles([(self.first.pk, ROLE_USER)])
+        self.assertEqual(revoke_roles([(self.first.pk, ROLE_GUEST)]), 1)
+        self.assertEqual(self.get_roles(self.first), {ROLE_USER})
+
+    def test_revoke_last_role(self):
+        assign_roles([(self.first.pk, ROLE_USER)])
+        with self.assertRaises(ValidationError) as error:
+            revoke_roles([
+                (self.first.pk, ROLE_GUEST),
+                (self.second.pk, ROLE_GUEST),
+            ])
+        self.assertEqual(error.exception.params['user_ids'], [self.second.pk])
+        self.assertEqual(self.get_roles(self.first), {ROLE_GUEST, ROLE_USER})
+        self.assertEqual(self.get_roles(self.second), {ROLE_GUEST})
+
+
+class UserStateInvalidationTests(TransactionTestCase):
+    """Сброс состояния пользователя только при изменении его доступа.
+
+    Версия области увеличивается один раз за транзакцию, поэтому тесты
+    фиксируют каждое изменение отдельно, а не внутри общей транзакции
+    TestCase.
+    """
+
+    serialized_rollback = True
+
+    def setUp(self):
+        self.user = User.objects.create_user('state@mail.ru', 'test2025')
+        user_state_cache.clear()
+        self.addCleanup(user_state_cache.clear)
+        user_state_cache.set(self.user.pk, UserState(True, False, 0))
+        self.last_change = AuthorizationChange.objects.order_by(
+            'pk'
+        ).values_list('pk', flat=True).last() or 0
+
+    def get_changes(self):
+        """Ключи изменений области users, записанных в тесте."""
+        return list(AuthorizationChange.objects.filter(
+            scope=AUTHZ_SCOPE_USERS, pk__gt=self.last_change
+        ).values_list('key', flat=True))
+
+    def test_access_change(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(user_state_cache.get(self.user.pk))
+        self.assertEqual(self.get_changes(), [self.user.pk])
+
+    def test_profile_change(self):
+        self.user.first_name = 'Иван'
+        self.user.save()
+        self.assertIsNotNone(user_state_cache.get(self.user.pk))
+        self.assertEqual(self.get_changes(), [])
+
+    def test_role_change(self):
+        Roles.objects.create(user=self.user, role=ROLE_USER)
+        self.assertIsNone(user_state_cache.get(self.user.pk))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.authz_version, 2)
+        self.assertEqual(self.get_changes(), [self.user.pk])
@@ -0,0 +1,59 @@
+"""JWT-токены с ролями пользователя."""
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .constants import AUTHZ_VERSION_CLAIM, EMAIL_CLAIM, ROLES_CLAIM
+from .models import Roles, User
+from .utils import get_setting
+
+
+class RolesRefreshToken(RefreshToken):
+    """Refresh-токен с ролями пользователя и версией его прав.
+
+    Роли и email записываются в токен при включенной настройке
+    TOKEN_ROLE_CLAIMS и копируются во все выпущенные по нему
+    access-токены. Если роли
+    пользователя изменились, при обновлении access-токена они
+    перечитываются из базы данных.
+    """
+
+    _role_claims_fresh = False
+
+    @classmethod
+    def for_user(cls, user):
+        """Выпуск токена с ролями и версией прав пользователя."""
+        token = super().for_user(user)
+        if get_setting('TOKEN_ROLE_CLAIMS'):
+            token[EMAIL_CLAIM] = user.email
+            token.set_role_claims(
+                user.roles.values_list('role', flat=True),
+                user.authz_version
+            )
+        return token
+
+    def set_role_claims(self, roles, version):
+        """Записывает в токен роли и версию прав пользователя."""
+        self[ROLES_CLAIM] = sorted(roles)
+        self[AUTHZ_VERSION_CLAIM] = version
+        self._role_claims_fresh = True
+
+    def refresh_role_claims(self):
+        """Перечитывает роли пользователя, если версия прав устарела."""
+        version = User.objects.filter(
+            pk=self[api_settings.USER_ID_CLAIM]
+        ).values_list('authz_version', flat=True).first()
+        if version is not None and version != self[AUTHZ_VERSION_CLAIM]:
+            self.set_role_claims(
+                Roles.objects.filter(
+                    user_id=self[api_settings.USER_ID_CLAIM]
+                ).values_list('role', flat=True),
+                version
+            )
+        self._role_claims_fresh = True
+
+    @property
+    def access_token(self):
+        """Access-токен с актуальными ролями пользователя."""
+        if ROLES_CLAIM in self.payload and not self._role_claims_fresh:
+            self.refresh_role_claims()
+        return super().access_token
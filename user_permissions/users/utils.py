@@ -1,4 +1,13 @@
 """Вспомогательные функции проекта."""
+from functools import cache
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.utils.crypto import get_random_string
+
+from .constants import USER_PERMISSIONS_DEFAULTS
+from permissions.metrics import PASSWORD_HASH_SECONDS
 
 
 def get_role_length(roles: list[tuple]) -> int:
@@ -9,3 +18,45 @@ def get_role_length(roles: list[tuple]) -> int:
     Возвращает максимальную длину среди всех полей 'role'.
     """
     return max(len(role) for role, _ in roles)
+
+
+def get_setting(name: str):
+    """Возвращает настройку проекта из словаря USER_PERMISSIONS.
+
+    Если настройка не задана в settings, берется значение по умолчанию
+    из USER_PERMISSIONS_DEFAULTS.
+    """
+    return getattr(settings, 'USER_PERMISSIONS', {}).get(
+        name, USER_PERMISSIONS_DEFAULTS[name]
+    )
+
+
+@cache
+def get_dummy_password_hash() -> str:
+    """Хеш случайного пароля для проверки при неизвестном email."""
+    return make_password(get_random_string(32))
+
+
+def check_user_password(user, password: str) -> bool:
+    """Проверяет пароль пользователя за одинаковое время.
+
+    Если пользователь не найден (user is None), пароль все равно
+    хешируется с фиктивным хешем, чтобы по времени ответа нельзя было
+    определить, зарегистрирован ли email.
+    """
+    start = perf_counter()
+    if user is None:
+        check_password(password, get_dummy_password_hash())
+        valid = False
+    else:
+        valid = check_password(password, user.password)
+    PASSWORD_HASH_SECONDS.observe(perf_counter() - start, 'check')
+    return valid
+
+
+def hash_password(password: str) -> str:
+    """Хеширует пароль с учетом времени хеширования в метриках."""
+    start = perf_counter()
+    encoded = make_password(password)
+    PASSWORD_HASH_SECONDS.observe(perf_counter() - start, 'make')
+    return encoded
@@ -0,0 +1,14 @@
+"""Валидаторы полей приложения users."""
+from django.apps import apps
+from django.core.exceptions import ValidationError
+
+
+def validate_role_name(value):
+    """Проверяет, что роль описана в справочнике ролей."""
+    role_definitions = apps.get_model('users', 'RoleDefinitions')
+    if not role_definitions.objects.filter(pk=value).exists():
+        raise ValidationError(
+            'Роль %(role)s не описана в справочнике ролей.',
+            code='unknown_role',
+            params={'role': value},
+        )